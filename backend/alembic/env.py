@@ -5,8 +5,13 @@ from alembic import context
 import os
 import sys
 
-from app.database import Base
-from app.models import *
+from app.models import Base
+
+# Migrations run synchronously (psycopg2) against the app's asyncpg URL,
+# straight to Postgres when the app goes through PgBouncer
+MIGRATION_DATABASE_URL = (
+    os.getenv("DATABASE_URL_DIRECT") or os.getenv("DATABASE_URL", "")
+).replace("+asyncpg", "")
 
 config = context.config
 
@@ -18,7 +23,7 @@ target_metadata = Base.metadata
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = os.getenv("DATABASE_URL")
+    configuration["sqlalchemy.url"] = MIGRATION_DATABASE_URL
     
     context.configure(
         url=configuration["sqlalchemy.url"],
@@ -33,7 +38,7 @@ def run_migrations_offline() -> None:
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = os.getenv("DATABASE_URL")
+    configuration["sqlalchemy.url"] = MIGRATION_DATABASE_URL
     
     connectable = engine_from_config(
         configuration,
@@ -0,0 +1,69 @@
+"""Initial users and messages tables
+
+Schema used to be created by Base.metadata.create_all at startup; databases
+bootstrapped that way already have these tables and are left untouched.
+
+Revision ID: 0000
+Revises: 
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0000'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('email', sa.String(255), nullable=False),
+            sa.Column('username', sa.String(255), nullable=False),
+            sa.Column('password_hash', sa.String(255), nullable=False),
+            sa.Column('mfa_enabled', sa.Boolean(), nullable=True),
+            sa.Column('mfa_secret', sa.String(32), nullable=True),
+            sa.Column('mfa_backup_codes', sa.String(500), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('is_anonymous', sa.Boolean(), nullable=True),
+            sa.Column('auth_method', sa.String(50), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('last_login_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    if 'messages' not in existing:
+        op.create_table(
+            'messages',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('room_id', sa.String(255), nullable=False),
+            sa.Column('sender_id', sa.UUID(), nullable=False),
+            sa.Column('content', sa.String(4096), nullable=False),
+            sa.Column('media_urls', sa.JSON(), nullable=True),
+            sa.Column('is_encrypted', sa.Boolean(), nullable=True),
+            sa.Column('is_deleted', sa.Boolean(), nullable=True),
+            sa.Column('deleted_at', sa.DateTime(), nullable=True),
+            sa.Column('reactions', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_messages_room_id', 'messages', ['room_id'])
+        op.create_index('ix_messages_sender_id', 'messages', ['sender_id'])
+        op.create_index('ix_messages_created_at', 'messages', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('messages')
+    op.drop_table('users')
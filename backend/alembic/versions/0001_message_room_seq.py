@@ -0,0 +1,32 @@
+"""Add per-room sequence numbers to messages
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = '0000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('seq', sa.BigInteger(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_messages_room_seq', 'messages', ['room_id', 'seq'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_messages_room_seq', table_name='messages')
+    op.drop_column('messages', 'seq')
@@ -0,0 +1,109 @@
+"""Partition messages by month on created_at
+
+The existing table is kept as-is and attached as the partition holding
+everything before next month, so no rows are copied (including this
+month's, which the table keeps receiving until the month ends). Monthly
+partitions from next month on are created here and kept ahead by
+app.database.partitions.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    # Rows from the current month already exist, so the legacy range has to
+    # extend to the end of it for the CHECK below to validate
+    boundary = _add_months(datetime.utcnow().date().replace(day=1), 1)
+
+    # Unique index matching the partitioned primary key, built without
+    # blocking writes and promoted to the primary key below
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS messages_legacy_id_created_at "
+            "ON messages (id, created_at)"
+        )
+
+    # Free the canonical names for the partitioned parent
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    # ATTACH needs the partition's primary key to match the parent's
+    # (id, created_at) and a table cannot have two, so PRIMARY KEY (id) is
+    # swapped for the prebuilt index (which also frees messages_pkey)
+    op.execute("ALTER TABLE messages_legacy DROP CONSTRAINT messages_pkey")
+    op.execute(
+        "ALTER TABLE messages_legacy ADD CONSTRAINT messages_legacy_pkey "
+        "PRIMARY KEY USING INDEX messages_legacy_id_created_at"
+    )
+    for index in ('idx_messages_room_created', 'idx_messages_room_seq',
+                  'ix_messages_room_id', 'ix_messages_sender_id'):
+        op.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_legacy")
+    op.execute("DROP INDEX IF EXISTS ix_messages_created_at")
+
+    op.execute(
+        "CREATE TABLE messages (LIKE messages_legacy INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id, created_at)")
+    op.execute("CREATE INDEX idx_messages_room_created ON messages (room_id, created_at DESC, id DESC)")
+    op.execute("CREATE INDEX idx_messages_room_seq ON messages (room_id, seq)")
+    op.execute("CREATE INDEX ix_messages_room_id ON messages (room_id)")
+    op.execute("CREATE INDEX ix_messages_sender_id ON messages (sender_id)")
+
+    # Proven by a validated CHECK so ATTACH skips the full-table scan
+    op.execute(
+        f"ALTER TABLE messages_legacy ADD CONSTRAINT messages_legacy_range "
+        f"CHECK (created_at < '{boundary}') NOT VALID"
+    )
+    op.execute("ALTER TABLE messages_legacy VALIDATE CONSTRAINT messages_legacy_range")
+    op.execute(
+        f"ALTER TABLE messages ATTACH PARTITION messages_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary}')"
+    )
+    op.execute("ALTER TABLE messages_legacy DROP CONSTRAINT messages_legacy_range")
+
+    for offset in range(MONTHS_AHEAD):
+        start = _add_months(boundary, offset)
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE messages_p{start:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+
+def downgrade() -> None:
+    # Copies every row back into one heap table, so stop writers first and
+    # expect it to take as long as a full table rewrite. Partitions already
+    # moved to the archive schema by app.database.partitions are no longer
+    # part of messages; they are left in place and not folded back
+    op.execute("CREATE TABLE messages_unpartitioned (LIKE messages INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO messages_unpartitioned SELECT * FROM messages")
+    op.execute("DROP TABLE messages")  # Takes every attached partition with it
+
+    op.execute("ALTER TABLE messages_unpartitioned RENAME TO messages")
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id)")
+    op.execute("CREATE INDEX idx_messages_room_created ON messages (room_id, created_at DESC, id DESC)")
+    op.execute("CREATE INDEX idx_messages_room_seq ON messages (room_id, seq)")
+    op.execute("CREATE INDEX ix_messages_room_id ON messages (room_id)")
+    op.execute("CREATE INDEX ix_messages_sender_id ON messages (sender_id)")
+    op.execute("CREATE INDEX ix_messages_created_at ON messages (created_at)")
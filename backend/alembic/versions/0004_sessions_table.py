@@ -0,0 +1,40 @@
+"""Add sessions table for AuthService
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sessions',
+        sa.Column('id', sa.UUID(), primary_key=True),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('token', sa.String(500), nullable=False, unique=True),
+        sa.Column('device_id', sa.String(255), nullable=True),
+        sa.Column('device_name', sa.String(255), nullable=True),
+        sa.Column('ip_address', sa.String(45), nullable=True),
+        sa.Column('user_agent', sa.String(500), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_sessions_user_id', 'sessions', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_user_id', table_name='sessions')
+    op.drop_table('sessions')
@@ -0,0 +1,33 @@
+"""Add room_members table for WebSocket membership checks
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'room_members',
+        sa.Column('room_id', sa.String(255), primary_key=True),
+        sa.Column('user_id', sa.UUID(), primary_key=True),
+        sa.Column('joined_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_room_members_user_id', 'room_members', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_room_members_user_id', table_name='room_members')
+    op.drop_table('room_members')
@@ -0,0 +1,52 @@
+"""Make (room_id, seq) unique in every messages partition
+
+Postgres only allows a unique index on a partitioned table when it
+includes the partition key (created_at), which would not stop a room's
+seq from repeating. Each partition gets its own unique (room_id, seq)
+index instead; app.database.partitions adds one to every partition it
+creates. These also serve every (room_id, seq) lookup, so the plain
+parent index is dropped.
+
+Building an index fails if the partition already holds duplicate seqs
+for a room; those rows have to be renumbered first.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partitions():
+    return op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'messages'::regclass"
+    )).scalars().all()
+
+
+def upgrade() -> None:
+    partitions = _partitions()
+    with op.get_context().autocommit_block():
+        for name in partitions:
+            op.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name}_room_seq_key "
+                f"ON {name} (room_id, seq)"
+            )
+    op.drop_index('idx_messages_room_seq', table_name='messages')
+
+
+def downgrade() -> None:
+    op.create_index('idx_messages_room_seq', 'messages', ['room_id', 'seq'])
+    for name in _partitions():
+        op.execute(f"DROP INDEX IF EXISTS {name}_room_seq_key")
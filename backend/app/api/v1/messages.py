@@ -1,8 +1,16 @@
 """Message endpoints"""
 
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_db_replica
+from app.models.message import Message
+from app.caching.room_message_cache import room_message_cache
+from app.services.websocket_manager import membership_cache
+from app.utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+from app.api.v1.rooms import current_user_id
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
@@ -24,3 +32,90 @@ async def get_dm_history(
     """Get DM conversation history"""
     # TODO: Implement history retrieval
     return {"messages": []}
+
+@router.get("/rooms/{room_id}/history")
+async def get_room_history(
+    room_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db_replica)
+):
+    """
+    Room history, newest first, paged by keyset cursor
+    - no cursor: the latest page
+    - before=<older_cursor>: the page of older messages
+    - after=<newer_cursor>: the page of newer messages
+    Each page is a range scan on idx_messages_room_created, so its cost does
+    not grow with how far back the client has scrolled
+    Only members may read a room, as on the WebSocket
+    """
+    
+    if not await membership_cache.is_member(room_id, user_id):
+        raise HTTPException(status_code=403, detail="Not a member")
+    
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after'")
+    
+    try:
+        boundary = decode_cursor(before or after) if (before or after) else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Opening a room: serve the first page from the per-room hot cache
+    if boundary is None and limit <= room_message_cache.max_messages:
+        messages = await room_message_cache.get_latest(room_id, limit)
+        if messages is None:
+            messages = await room_message_cache.load(db, room_id, limit)
+        
+        oldest = messages[-1] if messages else None
+        newest = messages[0] if messages else None
+        has_more = len(messages) == limit
+        return {
+            "messages": messages,
+            "older_cursor": encode_cursor(
+                datetime.fromisoformat(oldest["created_at"]), oldest["id"]
+            ) if oldest and has_more else None,
+            "newer_cursor": encode_cursor(
+                datetime.fromisoformat(newest["created_at"]), newest["id"]
+            ) if newest else None,
+            "has_more": has_more
+        }
+    
+    key = tuple_(Message.created_at, Message.id)
+    query = select(Message).where(
+        (Message.room_id == room_id) &
+        (Message.is_deleted == False)
+    )
+    
+    # The plain created_at bound duplicates the row comparison on purpose:
+    # the planner prunes partitions on it, which it cannot do from tuple_()
+    if after:
+        query = query.where(
+            (Message.created_at >= boundary[0]) & (key > boundary)
+        ).order_by(Message.created_at.asc(), Message.id.asc())
+    else:
+        if before:
+            query = query.where(
+                (Message.created_at <= boundary[0]) & (key < boundary)
+            )
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+    
+    # One extra row tells us whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    rows = list(result.scalars().all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after:
+        rows.reverse()
+    
+    newest, oldest = (rows[0], rows[-1]) if rows else (None, None)
+    has_older = has_more if not after else True
+    
+    return {
+        "messages": [message.to_dict() for message in rows],
+        "older_cursor": encode_cursor(oldest.created_at, oldest.id) if rows and has_older else None,
+        "newer_cursor": encode_cursor(newest.created_at, newest.id) if rows else after,
+        "has_more": has_more
+    }
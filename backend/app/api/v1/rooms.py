@@ -0,0 +1,92 @@
+"""Room endpoints"""
+
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.models.room_member import RoomMember
+from app.services.message_queue import message_queue, Events
+
+router = APIRouter(prefix="/rooms", tags=["rooms"])
+
+def current_user_id(request: Request) -> str:
+    """Caller identified by AuthContextMiddleware"""
+    user_id = getattr(request.state, "user_id", None)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return user_id
+
+async def has_member(db: AsyncSession, room_id: str, user_id: str = None) -> bool:
+    """Whether user_id (or anyone, if omitted) is a member of the room"""
+    query = select(RoomMember.user_id).where(RoomMember.room_id == room_id)
+    if user_id is not None:
+        query = query.where(RoomMember.user_id == user_id)
+    result = await db.execute(query.limit(1))
+    return result.scalar() is not None
+
+async def add_member(db: AsyncSession, room_id: str, user_id: str):
+    await db.execute(
+        insert(RoomMember)
+        .values(room_id=room_id, user_id=user_id, joined_at=datetime.utcnow())
+        .on_conflict_do_nothing()
+    )
+    await db.commit()
+    
+    # Drops cached "not a member" answers on every worker
+    await message_queue.publish_event('rooms', {
+        'type': Events.ROOM_MEMBER_JOINED,
+        'room_id': room_id,
+        'user_id': user_id
+    })
+
+@router.post("/{room_id}/join")
+async def join_room(
+    room_id: str,
+    user_id: str = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Join a room: only a room without members, which the caller then founds"""
+    if await has_member(db, room_id):
+        if not await has_member(db, room_id, user_id):
+            raise HTTPException(status_code=403, detail="Ask a member to add you")
+    else:
+        await add_member(db, room_id, user_id)
+    return {"room_id": room_id, "member": True}
+
+@router.post("/{room_id}/members/{member_id}")
+async def add_room_member(
+    room_id: str,
+    member_id: str,
+    user_id: str = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Add a user to a room; only its members may"""
+    if not await has_member(db, room_id, user_id):
+        raise HTTPException(status_code=403, detail="Not a member")
+    await add_member(db, room_id, member_id)
+    return {"room_id": room_id, "user_id": member_id, "member": True}
+
+@router.post("/{room_id}/leave")
+async def leave_room(
+    room_id: str,
+    user_id: str = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Leave a room"""
+    await db.execute(
+        delete(RoomMember).where(
+            (RoomMember.room_id == room_id) &
+            (RoomMember.user_id == user_id)
+        )
+    )
+    await db.commit()
+    
+    # Stops WebSocket connects being authorized from a cached answer
+    await message_queue.publish_event('rooms', {
+        'type': Events.ROOM_MEMBER_LEFT,
+        'room_id': room_id,
+        'user_id': user_id
+    })
+    return {"room_id": room_id, "member": False}
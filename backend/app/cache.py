@@ -1,24 +1,54 @@
 import redis.asyncio as redis
-from typing import Optional, Any
+from app.redis_client import redis_client
+from contextlib import asynccontextmanager
+from typing import Optional, Any, Dict, List, Tuple
+import asyncio
 import json
 import os
-from datetime import timedelta
 
-REDIS_URL = os.getenv("REDIS_URL")
+# Merge concurrent single-key calls into one pipeline per event-loop tick
+CACHE_AUTO_BATCH = os.getenv("CACHE_AUTO_BATCH", "false").lower() == "true"
+
+def _encode(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return str(value)
+
+class CachePipeline:
+    """
+    Commands queued inside `async with cache.pipeline() as pipe:` and sent
+    in one round trip when the block exits; replies are in pipe.results
+    """
+
+    def __init__(self, pipe):
+        self._pipe = pipe
+        self.results: List[Any] = []
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    def set(self, key: str, value: Any, ex: int = 3600):
+        return self._pipe.set(key, _encode(value), ex=ex)
 
 class Cache:
-    def __init__(self):
+    """
+    Thin wrapper over the Redis client
+    - mget/mset and pipeline() send many commands in one round trip
+    - With auto_batch, get/set/delete/exists calls issued in the same
+      event-loop tick (e.g. by handlers gathered for one page) are queued
+      and sent as a single pipeline; each caller still gets its own reply
+    """
+
+    def __init__(self, auto_batch: bool = False):
         self.redis: Optional[redis.Redis] = None
+        self.auto_batch = auto_batch
+        
+        # (command, args, kwargs, future) waiting for the next flush
+        self._pending: List[Tuple[str, tuple, dict, asyncio.Future]] = []
 
     async def connect(self):
         """Connect to Redis"""
-        self.redis = await redis.from_url(
-            REDIS_URL,
-            encoding="utf8",
-            decode_responses=True,
-            socket_connect_timeout=5,
-            socket_keepalive=True,
-        )
+        self.redis = redis_client(decode_responses=True)
 
     async def disconnect(self):
         """Disconnect from Redis"""
@@ -29,27 +59,86 @@ class Cache:
         """Get value from cache"""
         if not self.redis:
             return None
-        return await self.redis.get(key)
+        return await self._call("get", key)
 
     async def set(self, key: str, value: Any, ex: int = 3600):
         """Set value in cache"""
         if not self.redis:
             return
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        await self.redis.setex(key, ex, str(value))
+        await self._call("setex", key, ex, _encode(value))
 
     async def delete(self, key: str):
         """Delete from cache"""
         if not self.redis:
             return
-        await self.redis.delete(key)
+        await self._call("delete", key)
 
     async def exists(self, key: str) -> bool:
         """Check if key exists"""
         if not self.redis:
             return False
-        return await self.redis.exists(key) == 1
+        return await self._call("exists", key) == 1
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get many values in one round trip (None for missing keys)"""
+        if not self.redis or not keys:
+            return [None] * len(keys)
+        return await self.redis.mget(keys)
+
+    async def mset(self, mapping: Dict[str, Any], ex: int = 3600):
+        """Set many values, each with expiry ex, in one round trip"""
+        if not self.redis or not mapping:
+            return
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ex)
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False):
+        """
+        Queue commands and send them together on exit
+        transaction=True wraps them in MULTI/EXEC so they apply atomically
+        """
+        if not self.redis:
+            raise RuntimeError("Cache is not connected")
+        
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            batch = CachePipeline(pipe)
+            yield batch
+            batch.results = await pipe.execute()
+
+    async def _call(self, command: str, *args, **kwargs):
+        if not self.auto_batch:
+            return await getattr(self.redis, command)(*args, **kwargs)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            # Runs after every callback already scheduled for this tick
+            loop.call_soon(self._flush_pending)
+        self._pending.append((command, args, kwargs, future))
+        return await future
+
+    def _flush_pending(self):
+        batch, self._pending = self._pending, []
+        asyncio.ensure_future(self._execute(batch))
+
+    async def _execute(self, batch: List[Tuple[str, tuple, dict, asyncio.Future]]):
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for command, args, kwargs, _ in batch:
+                getattr(pipe, command)(*args, **kwargs)
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
     async def lpush(self, key: str, *values):
         """Push to list"""
@@ -63,4 +152,4 @@ class Cache:
             return None
         return await self.redis.rpop(key)
 
-cache = Cache()
+cache = Cache(auto_batch=CACHE_AUTO_BATCH)
@@ -4,43 +4,143 @@ Multi-level caching: In-memory → Redis → Database
 """
 
 from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+import math
+import time
+import uuid
+import random
 import asyncio
 import logging
+import orjson
+from app.redis_client import redis_client
+from app.config import settings
+from app.caching.l1_cache import L1Cache, MISSING
+from app.caching.keys import KeyBuilder
+from app.caching.serialization import get_serializer
 
 logger = logging.getLogger(__name__)
 
+# Every worker listens here and evicts the L1 keys each message names
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Keys touched per UNLINK / per broadcast message when invalidating a tag
+INVALIDATION_CHUNK = 500
+
+# Delete the load lease only if we still hold it
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
 class CacheManager:
     """
     Cache hierarchy:
     1. In-process memory cache (L1) - fastest, shared per instance
     2. Redis cache (L2) - shared across instances, distributed
     3. Database (L3) - source of truth, slowest
+    
+    L1 is bounded (LRU by entry count and bytes) and never keeps an entry
+    longer than l1_ttl, whatever TTL the caller asked for
+    
+    Keeping L1 coherent across instances:
+    - Writes to L2 and invalidations are broadcast on INVALIDATION_CHANNEL;
+      every other worker evicts the key or pattern from its L1
+    - A generation counter is bumped on every local or remote eviction; a
+      value read from Redis is only copied into L1 if no eviction happened
+      while the read was in flight, so a slow read cannot resurrect a value
+      that was invalidated during it
+    - If the subscription drops, broadcasts may have been missed, so L1 is
+      cleared before listening again
+    
+    get_or_load() is the read-through API for hot keys (see its docstring);
+    keys it manages hold an envelope and should not be read with get()
+    
+    Tags (e.g. "room:{id}", "user:{id}") group entries for invalidation:
+    - tag_mode="sets": each tagged key is added to the Redis set tag:{tag};
+      invalidate_tags() takes the members and UNLINKs them in pipelined
+      chunks, so the work is proportional to the entries affected
+    - tag_mode="generation": tagged keys embed the current generation of
+      each tag; invalidate_tags() is one INCR per tag and the orphaned
+      entries simply expire. Reads of tagged keys cost an MGET of the
+      generations unless this worker holds them in memory (dropped by the
+      same broadcast as L1 entries)
     """
     
-    def __init__(self):
-        self.l1_cache = {}  # In-memory
+    def __init__(
+        self,
+        l1_max_entries: int = 10_000,
+        l1_max_bytes: int = 64 * 1024 * 1024,
+        l1_ttl: float = 60,
+        load_lease: float = 5.0,
+        serializer=None,
+        tag_mode: str = "sets"
+    ):
+        self.l1_cache = L1Cache("cache_manager", max_entries=l1_max_entries, max_bytes=l1_max_bytes)
+        self.l1_ttl = l1_ttl
+        self.serializer = serializer or get_serializer()
         self.redis = None  # Initialized later
+        self.pubsub = None
+        self.instance_id = uuid.uuid4().hex
+        self.generation = 0
+        self._listener_task: Optional[asyncio.Task] = None
+        
+        # Cross-pod load lease length, and this process's loads in flight
+        self.load_lease = load_lease
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._release_lease = None
+        
+        self.tag_mode = tag_mode
+        self.tag_generations = L1Cache("cache_tag_generations", max_entries=l1_max_entries)
+    
+    async def initialize(self):
+        """Connect to Redis and start listening for invalidations"""
+        self.redis = redis_client()
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.subscribe(INVALIDATION_CHANNEL)
+        self._listener_task = asyncio.create_task(self._listen())
+        self._release_lease = self.redis.register_script(RELEASE_LEASE_SCRIPT)
     
-    async def get(self, key: str, ttl: int = 3600):
+    async def close(self):
+        """Stop listening and release the Redis connection"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        
+        if self.pubsub:
+            await self.pubsub.close()
+            self.pubsub = None
+        
+        if self.redis:
+            await self.redis.close()
+    
+    async def get(self, key: str, ttl: int = 3600, tags: Sequence[str] = ()):
         """
         Get from cache with fallback
         """
         
+        key = await self._key_for(key, tags)
+        
         # L1: Check in-memory
-        if key in self.l1_cache:
+        value = self.l1_cache.get(key)
+        if value is not MISSING:
             logger.debug(f"Cache hit (L1): {key}")
-            return self.l1_cache[key]['value']
+            return value
         
         # L2: Check Redis
         if self.redis:
+            generation = self.generation
             cached = await self.redis.get(key)
             if cached:
                 logger.debug(f"Cache hit (L2): {key}")
-                # Store in L1 for next time
-                self.l1_cache[key] = {
-                    'value': cached,
-                    'ttl': ttl
-                }
+                # Store in L1 for next time, unless it was invalidated meanwhile
+                if generation == self.generation:
+                    self.l1_cache.set(key, cached, min(ttl, self.l1_ttl))
                 return cached
         
         logger.debug(f"Cache miss: {key}")
@@ -51,65 +151,358 @@ class CacheManager:
         key: str,
         value: Any,
         ttl: int = 3600,
-        level: str = "both"  # 'l1', 'l2', 'both'
+        level: str = "both",  # 'l1', 'l2', 'both'
+        tags: Sequence[str] = ()
     ):
         """
         Set cache at specified level
         """
         
+        key = await self._key_for(key, tags)
+        
         if level in ['l1', 'both']:
-            self.l1_cache[key] = {
-                'value': value,
-                'ttl': ttl,
-                'set_at': datetime.utcnow()
-            }
+            self.l1_cache.set(key, value, min(ttl, self.l1_ttl))
         
         if level in ['l2', 'both'] and self.redis:
-            await self.redis.setex(key, ttl, value)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(key, ttl, value)
+            self._register_tags(pipe, key, tags, ttl)
+            await pipe.execute()
+            await self._broadcast(key=key)
+    
+    async def delete(self, key: str):
+        """Remove one key from L2 and from every worker's L1"""
+        
+        if self.redis:
+            await self.redis.delete(key)
+        
+        # L1 last, so nothing re-reads the old L2 value after the eviction
+        self._evict(key=key)
+        if self.redis:
+            await self._broadcast(key=key)
     
     async def invalidate(self, pattern: str):
         """Invalidate cache keys matching pattern"""
         
-        # L1: In-memory
-        keys_to_delete = [k for k in self.l1_cache.keys() if pattern in k]
-        for k in keys_to_delete:
-            del self.l1_cache[k]
-        
-        # L2: Redis
+        # L2: Redis. Still a walk over the whole keyspace; prefer tags
         if self.redis:
             cursor = 0
             while True:
-                cursor, keys = await self.redis.scan(cursor, match=pattern)
-                for key in keys:
-                    await self.redis.delete(key)
+                cursor, keys = await self.redis.scan(cursor, match=pattern, count=1000)
+                if keys:
+                    await self.redis.unlink(*keys)
                 if cursor == 0:
                     break
+        
+        # L1: In-memory (same glob syntax as the SCAN above), here and on
+        # every other worker; last, so nothing re-reads old L2 values
+        self._evict(pattern=pattern)
+        if self.redis:
+            await self._broadcast(pattern=pattern)
+    
+    async def invalidate_tags(self, *tags: str):
+        """Drop every entry registered under any of tags, on every level"""
+        
+        if not tags:
+            return
+        
+        if self.tag_mode == "generation":
+            if self.redis:
+                pipe = self.redis.pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(self._tag_key(tag) + ":gen")
+                await pipe.execute()
+            self._evict(tags=list(tags))
+            if self.redis:
+                await self._broadcast(tags=list(tags))
+            return
+        
+        if not self.redis:
+            return
+        
+        # Take the members and drop the sets atomically; keys tagged after
+        # this start new sets
+        pipe = self.redis.pipeline(transaction=True)
+        for tag in tags:
+            pipe.smembers(self._tag_key(tag))
+            pipe.unlink(self._tag_key(tag))
+        results = await pipe.execute()
+        keys = sorted({member.decode() for members in results[::2] for member in members})
+        
+        for start in range(0, len(keys), INVALIDATION_CHUNK):
+            chunk = keys[start:start + INVALIDATION_CHUNK]
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.unlink(*chunk)
+            pipe.publish(INVALIDATION_CHANNEL, self._event(keys=chunk))
+            await pipe.execute()
+            self._evict(keys=chunk)
+    
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"tag:{tag}"
+    
+    def _register_tags(self, pipe, key: str, tags: Sequence[str], ttl: int):
+        """Queue SADDs of key to its tag sets, keeping each set alive as long as its longest entry"""
+        if self.tag_mode != "sets":
+            return
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, key)
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+    
+    async def _key_for(self, key: str, tags: Sequence[str]) -> str:
+        """In generation mode, the key under the tags' current generations"""
+        
+        if not tags or self.tag_mode != "generation":
+            return key
+        
+        generations = {tag: self.tag_generations.get(tag, count=False) for tag in tags}
+        missing = [tag for tag, generation in generations.items() if generation is MISSING]
+        if missing:
+            fetched = [None] * len(missing)
+            if self.redis:
+                evictions = self.generation
+                fetched = await self.redis.mget([self._tag_key(tag) + ":gen" for tag in missing])
+            for tag, value in zip(missing, fetched):
+                generations[tag] = int(value or 0)
+                if self.redis and evictions == self.generation:
+                    self.tag_generations.set(tag, generations[tag], self.l1_ttl)
+        
+        return key + ":g" + ".".join(str(generations[tag]) for tag in tags)
+    
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 3600,
+        stale_ttl: int = 0,
+        beta: float = 1.0,
+        lease: bool = True,
+        tags: Sequence[str] = ()
+    ) -> Any:
+        """
+        Read-through with stampede protection
+        - Single-flight: concurrent misses in this process share one load
+        - lease=True: across pods only the holder of a short Redis lease
+          loads; the others poll L2 for its result until the lease runs out
+        - Probabilistic early refresh (XFetch): as expiry nears, a request
+          refreshes in the background with a probability that grows with
+          the last load's duration, times beta, so popular keys are
+          reloaded before they expire instead of all at once after
+        - stale_ttl > 0: for that long after expiry the old value is still
+          served while one background load replaces it
+        Values are stored with self.serializer; objects with to_dict()
+        (ORM models) come back as that dict, from L1 as well as L2
+        """
+        
+        key = await self._key_for(key, tags)
+        entry = await self._read_entry(key)
+        if entry is not None:
+            value, delta, expires_at = entry
+            now = time.time()
+            
+            if now - delta * beta * math.log(random.random() or 1e-12) < expires_at:
+                return value
+            
+            if now < expires_at + stale_ttl:
+                self._refresh(key, loader, ttl, stale_ttl, lease, tags)
+                return value
+        
+        return await self._single_flight(key, loader, ttl, stale_ttl, lease, tags, wait=True)
+    
+    async def _read_entry(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """(value, last load duration, soft expiry) from L1, then L2"""
+        
+        entry = self.l1_cache.get(key)
+        if entry is not MISSING:
+            return entry
+        
+        if not self.redis:
+            return None
+        
+        generation = self.generation
+        raw = await self.redis.get(key)
+        if raw is None:
+            return None
+        
+        envelope = self.serializer.loads(raw)
+        entry = (envelope['v'], envelope['d'], envelope['e'])
+        remaining = entry[2] - time.time()
+        if generation == self.generation and remaining > 0:
+            self.l1_cache.set(key, entry, min(remaining, self.l1_ttl), size=len(raw))
+        return entry
+    
+    def _refresh(self, key, loader, ttl, stale_ttl, lease, tags):
+        """Background reload; errors are logged and the current value kept"""
+        
+        if key in self._inflight:
+            return
+        
+        def _done(task: asyncio.Task):
+            if not task.cancelled() and task.exception():
+                logger.error(f"Background cache refresh failed for {key}: {task.exception()}")
+        
+        task = asyncio.ensure_future(
+            self._single_flight(key, loader, ttl, stale_ttl, lease, tags, wait=False)
+        )
+        task.add_done_callback(_done)
+    
+    async def _single_flight(self, key, loader, ttl, stale_ttl, lease, tags, wait: bool):
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._load(key, loader, ttl, stale_ttl, lease, tags, wait))
+            self._inflight[key] = flight
+            flight.add_done_callback(
+                lambda f: self._inflight.pop(key) if self._inflight.get(key) is f else None
+            )
+        
+        # Shielded so one cancelled caller does not cancel everyone's load
+        value = await asyncio.shield(flight)
+        if value is MISSING and wait:
+            # Joined a background refresh that deferred to another pod
+            return await self._single_flight(key, loader, ttl, stale_ttl, lease, tags, wait=True)
+        return value
+    
+    async def _load(self, key, loader, ttl, stale_ttl, lease, tags, wait: bool):
+        token = None
+        if lease and self.redis:
+            token = uuid.uuid4().hex
+            acquired = await self.redis.set(
+                f"{key}:lease", token, nx=True, px=int(self.load_lease * 1000)
+            )
+            if not acquired:
+                if not wait:
+                    return MISSING  # Another pod is already refreshing
+                
+                deadline = time.monotonic() + self.load_lease
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                    raw = await self.redis.get(key)
+                    if raw is not None:
+                        envelope = self.serializer.loads(raw)
+                        if envelope['e'] > time.time():
+                            return envelope['v']
+                # The holder died or is slow: load it ourselves
+                token = None
+        
+        try:
+            generation = self.generation
+            started = time.monotonic()
+            value = await loader()
+            delta = time.monotonic() - started
+            
+            expires_at = time.time() + ttl
+            payload = self.serializer.dumps({'v': value, 'd': delta, 'e': expires_at})
+            
+            # Round-trip so callers get the same shape whichever level answers
+            value = self.serializer.loads(payload)['v']
+            if generation != self.generation:
+                # Invalidated while loading: the value may predate the write
+                # behind it, so hand it to this caller without caching it
+                return value
+            self.l1_cache.set(key, (value, delta, expires_at), min(ttl, self.l1_ttl), size=len(payload))
+            if self.redis:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.set(key, payload, ex=ttl + stale_ttl)
+                self._register_tags(pipe, key, tags, ttl + stale_ttl)
+                await pipe.execute()
+                await self._broadcast(key=key)
+            return value
+        finally:
+            if token:
+                await self._release_lease(keys=[f"{key}:lease"], args=[token])
+    
+    def _evict(
+        self,
+        key: Optional[str] = None,
+        pattern: Optional[str] = None,
+        keys: Sequence[str] = (),
+        tags: Sequence[str] = ()
+    ):
+        """Drop from this worker's L1 only"""
+        self.generation += 1
+        if key is not None:
+            self.l1_cache.pop(key)
+        if pattern is not None:
+            self.l1_cache.pop_matching(pattern)
+        for each in keys:
+            self.l1_cache.pop(each)
+        for tag in tags:
+            self.tag_generations.pop(tag)
+    
+    def _event(self, **fields) -> bytes:
+        return orjson.dumps({'origin': self.instance_id, **fields})
+    
+    async def _broadcast(self, **fields):
+        """Tell other workers to _evict(**fields)"""
+        await self.redis.publish(INVALIDATION_CHANNEL, self._event(**fields))
+    
+    async def _listen(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0
+                )
+                if message is None or message['type'] != 'message':
+                    continue
+                
+                event = orjson.loads(message['data'])
+                if event.pop('origin') != self.instance_id:
+                    self._evict(**event)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Invalidations may have been missed while disconnected
+                logger.error(f"Cache invalidation listener error: {e}")
+                self._evict()
+                self.l1_cache.clear()
+                self.tag_generations.clear()
+                await asyncio.sleep(1)
 
 # Cache decorator
-cache_manager = CacheManager()
+cache_manager = CacheManager(
+    l1_max_entries=settings.cache_l1_max_entries,
+    l1_max_bytes=settings.cache_l1_max_bytes,
+    l1_ttl=settings.cache_l1_ttl_seconds,
+    load_lease=settings.cache_load_lease_seconds,
+    serializer=get_serializer(settings.cache_serializer, settings.cache_compress_threshold),
+    tag_mode=settings.cache_tag_mode
+)
 
-def cached(ttl: int = 3600, key_prefix: str = ""):
+def cached(
+    ttl: int = 3600,
+    key_prefix: str = "",
+    stale_ttl: int = 0,
+    key_args: Optional[Sequence[str]] = None,
+    version: int = 1,
+    tags: Sequence[str] = ()
+):
     """
     Decorator for caching function results
+    Read-through via cache_manager.get_or_load, so an expiring hot key is
+    recomputed once rather than by every concurrent caller
+    Keys hash the bound arguments (see KeyBuilder); key_args names the
+    ones that identify the result when others (e.g. clients) do not
+    tags are templates over the arguments, e.g. tags=["room:{room_id}"],
+    for cache_manager.invalidate_tags
     """
     def decorator(func):
+        build_key = KeyBuilder(func, prefix=key_prefix, key_args=key_args, version=version)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = f"{key_prefix}:{func.__name__}:{args}:{kwargs}"
-            
-            # Try cache
-            cached_value = await cache_manager.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-            
-            # Execute function
-            result = await func(*args, **kwargs)
-            
-            # Store in cache
-            await cache_manager.set(cache_key, result, ttl=ttl)
+            cache_key = build_key(*args, **kwargs)
             
-            return result
+            return await cache_manager.get_or_load(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                stale_ttl=stale_ttl,
+                tags=build_key.tags(tags, *args, **kwargs) if tags else ()
+            )
         return wrapper
     return decorator
 
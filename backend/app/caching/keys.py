@@ -0,0 +1,104 @@
+# /backend/app/caching/keys.py
+"""
+Deterministic cache keys for @cached functions
+Same arguments give the same key in every process
+"""
+
+import enum
+import inspect
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence
+from uuid import UUID
+import orjson
+
+def _is_session(value: Any) -> bool:
+    """Database sessions are dependencies, not part of a result's identity"""
+    try:
+        from sqlalchemy.orm import Session
+        from sqlalchemy.ext.asyncio import AsyncSession
+    except ImportError:
+        return False
+    return isinstance(value, (Session, AsyncSession))
+
+def normalize(value: Any) -> Any:
+    """
+    Reduce an argument to JSON primitives with a stable form
+    ORM instances are keyed by class and primary key; anything else that
+    has no stable form raises TypeError (declare key_args to leave it out)
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return normalize(value.value)
+    if isinstance(value, (UUID, Decimal, datetime, date)):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((normalize(item) for item in value), key=orjson.dumps)
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+
+    try:
+        from sqlalchemy import inspect as sa_inspect
+        state = sa_inspect(value, raiseerr=False)
+    except ImportError:
+        state = None
+    if state is not None and getattr(state, "identity", None):
+        return [type(value).__name__, [normalize(part) for part in state.identity]]
+
+    raise TypeError(
+        f"Cannot build a cache key from {type(value).__name__}; "
+        f"pass key_args to choose the arguments that identify the result"
+    )
+
+class KeyBuilder:
+    """
+    Key for one decorated function:
+        {prefix}:{module}.{qualname}:v{version}:{hash of bound arguments}
+    - Arguments are bound to the signature, so f(1) and f(user_id=1) match
+      and defaults are included
+    - key_args limits the key to the named parameters; without it every
+      parameter is used except sessions, self and cls
+    - version is bumped when the cached value's shape changes
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        prefix: str = "",
+        key_args: Optional[Sequence[str]] = None,
+        version: int = 1
+    ):
+        self.signature = inspect.signature(func)
+        self.namespace = f"{prefix}:{func.__module__}.{func.__qualname__}:v{version}"
+        self.key_args = list(key_args) if key_args is not None else None
+
+        unknown = set(self.key_args or ()) - set(self.signature.parameters)
+        if unknown:
+            raise ValueError(f"key_args not in signature of {func.__qualname__}: {sorted(unknown)}")
+
+    def __call__(self, *args, **kwargs) -> str:
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+
+        if self.key_args is not None:
+            identity = {name: bound.arguments[name] for name in self.key_args}
+        else:
+            identity = {
+                name: value for name, value in bound.arguments.items()
+                if name not in ("self", "cls") and not _is_session(value)
+            }
+
+        payload = orjson.dumps(normalize(identity), option=orjson.OPT_SORT_KEYS)
+        return f"{self.namespace}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+    def tags(self, templates: Sequence[str], *args, **kwargs) -> List[str]:
+        """Fill tag templates such as "room:{room_id}" from the call's arguments"""
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return [template.format(**bound.arguments) for template in templates]
@@ -0,0 +1,159 @@
+# /backend/app/caching/l1_cache.py
+"""
+Bounded in-process cache (L1)
+LRU eviction by entry count and approximate memory, TTL expiry on read
+"""
+
+import sys
+import time
+import fnmatch
+import logging
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+L1_HITS = Counter(
+    'cache_l1_hits_total',
+    'L1 lookups served from memory',
+    ['cache']
+)
+L1_MISSES = Counter(
+    'cache_l1_misses_total',
+    'L1 lookups that found nothing usable',
+    ['cache']
+)
+L1_EVICTIONS = Counter(
+    'cache_l1_evictions_total',
+    'Entries dropped from L1',
+    ['cache', 'reason']
+)
+L1_BYTES = Gauge(
+    'cache_l1_bytes',
+    'Approximate memory held by L1 values',
+    ['cache']
+)
+
+# Returned by get() on a miss, so None can be cached
+MISSING = object()
+
+def approximate_size(value: Any) -> int:
+    """Cheap size estimate; exact for the bytes/str values Redis hands back"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return sys.getsizeof(value)
+
+class L1Cache:
+    """
+    OrderedDict LRU (least recently used first)
+    - Bounded by max_entries and by max_bytes of approximate value size;
+      inserting past either bound evicts from the cold end
+    - Entries carry an absolute monotonic expiry; expired entries are
+      dropped when read and when they reach the cold end
+    - hits/misses/evictions are kept as plain counters (stats()) and as
+      Prometheus metrics labelled by name
+    """
+
+    def __init__(self, name: str = "default", max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, monotonic expiry, size)
+        self.entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._hits = L1_HITS.labels(cache=name)
+        self._misses = L1_MISSES.labels(cache=name)
+        self._bytes = L1_BYTES.labels(cache=name)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not MISSING
+
+    def get(self, key: Hashable, count: bool = True) -> Any:
+        """Value for key, or MISSING if absent or expired"""
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                    self._hits.inc()
+                return entry[0]
+            self._remove(key, "expired")
+
+        if count:
+            self.misses += 1
+            self._misses.inc()
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: Optional[int] = None):
+        """
+        Store value for ttl seconds, evicting cold entries to stay in bounds
+        size overrides the estimate, e.g. with the length of the serialized
+        form for containers sys.getsizeof would only count shallowly
+        """
+
+        if size is None:
+            size = approximate_size(value)
+        if size > self.max_bytes:
+            self.pop(key)
+            return
+
+        if key in self.entries:
+            self.bytes -= self.entries[key][2]
+        self.entries[key] = (value, time.monotonic() + ttl, size)
+        self.entries.move_to_end(key)
+        self.bytes += size
+
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest, (_, expires_at, _) = next(iter(self.entries.items()))
+            self._remove(oldest, "expired" if expires_at <= time.monotonic() else "size")
+
+        self._bytes.set(self.bytes)
+
+    def pop(self, key: Hashable) -> bool:
+        """Drop key; True if it was cached"""
+        if key not in self.entries:
+            return False
+        self._remove(key, "invalidated")
+        return True
+
+    def pop_matching(self, pattern: str) -> int:
+        """Drop every string key matching a Redis-style glob pattern"""
+        keys = [k for k in self.entries if isinstance(k, str) and fnmatch.fnmatchcase(k, pattern)]
+        for key in keys:
+            self._remove(key, "invalidated")
+        return len(keys)
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+        self._bytes.set(0)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable, reason: str):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+        self.evictions += 1
+        L1_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+        self._bytes.set(self.bytes)
@@ -0,0 +1,137 @@
+# /backend/app/caching/room_message_cache.py
+"""
+Hot cache of each room's most recent messages
+Opening a room reads its first page from Redis instead of Postgres
+"""
+
+import logging
+from typing import List, Optional
+import orjson
+from app.redis_client import redis_client
+from redis.exceptions import WatchError
+from sqlalchemy import select
+from app.config import settings
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+# Tail marker: the list holds the room's whole history (messages are JSON
+# objects, so it can never collide with one)
+HISTORY_START = b"start"
+
+class RoomMessageCache:
+    """
+    Redis list per room holding the newest max_messages serialized messages
+    (newest first, same shape as Message.to_dict())
+    - append() is write-through from the send path: LPUSH + LTRIM
+    - A page is served from the list when it holds at least `limit`
+      messages (appends reach it before anything else could, so its head is
+      always the newest), or fewer that end in HISTORY_START. That marker is
+      only written by a fill that found the room's whole history, and lives
+      in the list so it cannot outlive an evicted list the way a separate
+      key could. Anything else is cold and read from Postgres
+    - Appends to a cold room are kept and merged into the fill, so messages
+      not yet flushed by the write-behind writer are never lost from the
+      first page
+    - One list per room regardless of the page size requested
+    """
+
+    def __init__(self, max_messages: int = 50, ttl: int = 86400):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.redis = None
+
+    async def initialize(self):
+        """Connect to Redis"""
+        self.redis = redis_client()
+
+    async def close(self):
+        if self.redis:
+            await self.redis.close()
+
+    @staticmethod
+    def _key(room_id: str) -> str:
+        return f"room:{room_id}:recent"
+
+    async def append(self, room_id: str, message: dict):
+        """Write-through a newly sent message"""
+
+        key = self._key(room_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lpush(key, orjson.dumps(message))
+        pipe.ltrim(key, 0, self.max_messages - 1)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def invalidate(self, room_id: str):
+        """Drop the room's cache (call on edit and delete)"""
+        await self.redis.delete(self._key(room_id))
+
+    async def get_latest(self, room_id: str, limit: int) -> Optional[List[dict]]:
+        """Newest `limit` messages, or None if the room is cold or limit is too big"""
+
+        if limit > self.max_messages:
+            return None
+
+        # One extra item shows whether the history ends right after the page
+        items = await self.redis.lrange(self._key(room_id), 0, limit)
+        messages = [orjson.loads(item) for item in items if item != HISTORY_START][:limit]
+        if len(messages) < limit and HISTORY_START not in items:
+            return None
+
+        return messages
+
+    async def load(self, db, room_id: str, limit: int) -> List[dict]:
+        """Fill a cold room from Postgres and return its newest `limit` messages"""
+
+        result = await db.execute(
+            select(Message)
+            .where((Message.room_id == room_id) & (Message.is_deleted == False))
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(self.max_messages)
+        )
+        rows = [message.to_dict() for message in result.scalars().all()]
+
+        try:
+            rows = await self._fill(room_id, rows)
+        except Exception as e:
+            logger.error(f"Failed to fill room message cache: {e}")
+
+        return rows[:limit]
+
+    async def _fill(self, room_id: str, rows: List[dict]) -> List[dict]:
+        key = self._key(room_id)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for _ in range(3):
+                try:
+                    await pipe.watch(key)
+
+                    # Messages appended while cold are newer than (or equal to) rows
+                    appended = [
+                        orjson.loads(item) for item in await pipe.lrange(key, 0, -1)
+                        if item != HISTORY_START
+                    ]
+                    seen = {message['id'] for message in appended}
+                    merged = (appended + [r for r in rows if r['id'] not in seen])[:self.max_messages]
+
+                    pipe.multi()
+                    pipe.delete(key)
+                    items = [orjson.dumps(message) for message in merged]
+                    # Short of max_messages, rows are the room's whole history;
+                    # the marker is trimmed away once appends fill the list
+                    if len(rows) < self.max_messages and len(merged) < self.max_messages:
+                        items.append(HISTORY_START)
+                    pipe.rpush(key, *items)
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                    return merged
+                except WatchError:
+                    continue
+
+        return rows
+
+room_message_cache = RoomMessageCache(
+    max_messages=settings.room_recent_messages,
+    ttl=settings.room_recent_messages_ttl_seconds
+)
@@ -0,0 +1,87 @@
+# /backend/app/caching/serialization.py
+"""
+Pluggable serializers for values stored in Redis
+orjson by default, msgpack when installed, zlib above a size threshold
+"""
+
+import zlib
+import logging
+from typing import Any
+import orjson
+
+logger = logging.getLogger(__name__)
+
+def to_primitive(value: Any) -> Any:
+    """
+    Fallback for types orjson/msgpack do not know
+    ORM instances are stored through their to_dict(), never as objects
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+class OrjsonSerializer:
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=to_primitive, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+class MsgpackSerializer:
+    """Smaller than JSON and keeps bytes as bytes; needs the msgpack package"""
+
+    name = "msgpack"
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, default=to_primitive, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, raw=False)
+
+class CompressingSerializer:
+    """
+    Wraps another serializer; payloads of threshold bytes or more are zlib
+    compressed. A one-byte header says which, so the threshold can change
+    without invalidating what is already stored
+    """
+
+    RAW = b"\x00"
+    ZLIB = b"\x01"
+
+    def __init__(self, inner, threshold: int = 1024, level: int = 1):
+        self.inner = inner
+        self.threshold = threshold
+        self.level = level
+        self.name = f"{inner.name}+zlib"
+
+    def dumps(self, value: Any) -> bytes:
+        data = self.inner.dumps(value)
+        if len(data) >= self.threshold:
+            return self.ZLIB + zlib.compress(data, self.level)
+        return self.RAW + data
+
+    def loads(self, data: bytes) -> Any:
+        header, body = data[:1], data[1:]
+        if header == self.ZLIB:
+            body = zlib.decompress(body)
+        return self.inner.loads(body)
+
+SERIALIZERS = {
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+def get_serializer(name: str = "orjson", compress_threshold: int = 0):
+    """Serializer by name; compress_threshold > 0 adds zlib compression"""
+    serializer = SERIALIZERS[name]()
+    if compress_threshold > 0:
+        serializer = CompressingSerializer(serializer, threshold=compress_threshold)
+    return serializer
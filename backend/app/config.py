@@ -15,6 +15,52 @@ class Settings(BaseSettings):
     
     # Redis
     redis_url: str = "redis://localhost:6379"
+    redis_max_connections: int = 100  # Per pool per worker; pub/sub listeners hold one each
+    redis_pool_timeout_seconds: float = 5.0  # Wait for a free connection before failing
+    redis_retries: int = 3  # Retries (with jittered backoff) on connection errors
+    
+    # Caching (CacheManager)
+    cache_l1_max_entries: int = 10000  # Per-worker in-memory entries
+    cache_l1_max_bytes: int = 64 * 1024 * 1024  # Approximate value bytes per worker
+    cache_l1_ttl_seconds: int = 60  # Upper bound on how long L1 serves a value
+    cache_load_lease_seconds: float = 5.0  # Other pods wait this long for a key being loaded
+    cache_serializer: str = "orjson"  # "orjson" or "msgpack" (needs the msgpack package)
+    cache_compress_threshold: int = 1024  # zlib values at least this big; 0 disables
+    cache_tag_mode: str = "sets"  # "sets" (UNLINK tagged keys) or "generation" (O(1) INCR)
+    
+    # WebSockets
+    ws_outbound_queue_size: int = 256  # Frames buffered per socket before eviction
+    ws_max_rooms_per_socket: int = 200  # Room subscriptions allowed on the multiplexed socket
+    typing_window_ms: int = 300  # Typing frames are coalesced per room over this window
+    typing_ttl_seconds: int = 6  # Typists with no refresh are expired after this
+    room_event_buffer_size: int = 500  # Recent sequenced frames kept per room for resume
+    room_event_buffer_ttl_seconds: int = 3600
+    room_recent_messages: int = 50  # Newest messages cached per room for the first page
+    room_recent_messages_ttl_seconds: int = 86400
+    presence_ttl_seconds: int = 60  # Clients heartbeat well inside this (e.g. every 20s)
+    presence_flush_seconds: float = 1.0  # Presence diffs are batched per room over this
+    membership_cache_size: int = 100000  # (room, user) membership answers kept per worker
+    membership_cache_ttl_seconds: int = 300
+    
+    # Message persistence (write-behind)
+    message_batch_size: int = 200  # Flush as soon as this many messages are buffered
+    message_flush_ms: int = 50  # ...or when the oldest buffered message is this old
+    message_recover_idle_seconds: int = 60  # Journal entries unacked this long belong to a dead worker
+    message_recover_interval_seconds: int = 30
+    message_max_pending: int = 10000  # Sends are refused while this many await Postgres
+    message_partitions_ahead: int = 3  # Monthly messages partitions created in advance
+    message_archive_after_days: Optional[int] = None  # Default: longest tier history; never while a tier is unlimited
+    
+    # Event bus (MessageQueue)
+    event_bus_backend: str = "streams"  # "streams" (durable) or "pubsub" (fire-and-forget)
+    event_stream_maxlen: int = 100000  # Approximate cap per channel stream
+    event_batch_size: int = 100  # Entries per XREADGROUP
+    event_block_ms: int = 5000
+    event_handler_concurrency: int = 10  # Concurrent handlers per consumer
+    event_dispatch_queue_size: int = 1000  # Events buffered per channel before reads pause
+    event_reclaim_interval_seconds: int = 30
+    event_reclaim_idle_ms: int = 60000  # Pending this long => consumer presumed dead
+    event_max_deliveries: int = 5  # Then moved to the channel's dead-letter stream
     
     # Security
     secret_key: str = "change-me-in-production"
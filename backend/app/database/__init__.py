@@ -0,0 +1,265 @@
+# /backend/app/database/__init__.py
+"""
+Data layer: pooled engines, session factories and replica routing
+Schema is managed by Alembic migrations, never created at startup
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import event, text
+from fastapi import Request
+from collections import OrderedDict
+from typing import List, Optional
+from app.redis_client import redis_client
+import itertools
+import asyncio
+import logging
+import time
+import os
+
+from app.database.pool import create_engine_with_pool, POOL_CONFIG, DIRECT_POOL_CONFIG
+from app.database.pool_metrics import OverflowTuner
+from app.models.base import Base
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL_REPLICA = os.getenv("DATABASE_URL_REPLICA")  # Comma-separated for several
+
+# "transaction" when DATABASE_URL(_REPLICA) point at PgBouncer in transaction
+# pooling mode; DATABASE_URL_DIRECT then reaches Postgres itself
+DATABASE_POOL_MODE = os.getenv("DATABASE_POOL_MODE", "session")
+DATABASE_URL_DIRECT = os.getenv("DATABASE_URL_DIRECT")
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Replicas further behind than this are skipped
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+
+# Reads stay on the primary this long after the same user wrote
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+# Pool sizing per deployment environment (see POOL_CONFIG)
+ENVIRONMENT = os.getenv("ENV", "development")
+POOL_SETTINGS = POOL_CONFIG.get(ENVIRONMENT, POOL_CONFIG["development"])
+
+# Let max_overflow follow demand up to POOL_CONFIG's overflow_limit
+DB_POOL_ADAPTIVE = os.getenv("DB_POOL_ADAPTIVE", "false").lower() == "true"
+
+# The only engines in the process; everything else borrows their pools
+engine = create_engine_with_pool(
+    DATABASE_URL, POOL_SETTINGS, name="primary", pool_mode=DATABASE_POOL_MODE
+)
+
+# Read replica engines
+replica_engines = [
+    create_engine_with_pool(
+        url.strip(), POOL_SETTINGS, name=f"replica{i}", pool_mode=DATABASE_POOL_MODE
+    )
+    for i, url in enumerate(u for u in (DATABASE_URL_REPLICA or "").split(",") if u.strip())
+]
+replica_engine = replica_engines[0] if replica_engines else None
+
+# For work that needs one server session across statements (partition
+# maintenance); the primary engine itself unless behind a transaction pooler
+if DATABASE_POOL_MODE == "transaction" and DATABASE_URL_DIRECT:
+    direct_engine = create_engine_with_pool(DATABASE_URL_DIRECT, DIRECT_POOL_CONFIG, name="direct")
+else:
+    direct_engine = engine
+
+# Behind PgBouncer there is no local pool to tune
+pool_tuner = OverflowTuner(
+    {} if DATABASE_POOL_MODE == "transaction" else
+    {"primary": engine, **{f"replica{i}": e for i, e in enumerate(replica_engines)}},
+    limit=POOL_SETTINGS.get("overflow_limit", POOL_SETTINGS["max_overflow"])
+)
+
+class PrimarySession(Session):
+    """Sync session class behind primary AsyncSessions (write tracking hooks)"""
+
+# Session factory
+AsyncSessionLocal = sessionmaker(
+    engine, class_=AsyncSession, sync_session_class=PrimarySession,
+    expire_on_commit=False, future=True
+)
+
+# Replica sessions
+AsyncSessionReplicas = [
+    sessionmaker(replica, class_=AsyncSession, expire_on_commit=False, future=True)
+    for replica in replica_engines
+]
+AsyncSessionReplica = AsyncSessionReplicas[0] if AsyncSessionReplicas else None
+
+async def dispose_engines():
+    """Close every pooled connection (on shutdown)"""
+    for pooled in {engine, direct_engine, *replica_engines}:
+        await pooled.dispose()
+
+class SessionRouter:
+    """
+    Routes sessions between the primary and read replicas
+    - Writes (and any session from get_db) go to the primary
+    - Read-only sessions go round-robin to replicas whose replay lag is
+      within REPLICA_MAX_LAG_SECONDS, measured with
+      pg_last_xact_replay_timestamp() by a background monitor
+    - A user who wrote within READ_YOUR_WRITES_SECONDS reads from the
+      primary, on every instance (recent writers are recorded in Redis)
+    - With no healthy replica, reads fall back to the primary
+    """
+    
+    # Zero when the replica has replayed everything it received, so an idle
+    # primary does not make an up-to-date replica look stale
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+    
+    def __init__(self, primary, replicas: List, replica_engines: List):
+        self.primary = primary
+        self.replicas = replicas
+        self.replica_engines = replica_engines
+        
+        # Replica index -> last measured lag (None = unreachable)
+        self.lag: List[Optional[float]] = [None] * len(replicas)
+        self.healthy: List[int] = []
+        self._rotation = itertools.count()
+        
+        # Sticky key -> monotonic time of last write seen by this instance,
+        # oldest first so mark_write can drop expired keys from the front
+        self._recent_writes = OrderedDict()
+        self.redis = None
+        
+        # Redis writes from mark_write, referenced until they finish
+        self._marks = set()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self, interval: float = 1.0):
+        """Start lag monitoring"""
+        if REDIS_URL:
+            self.redis = redis_client()
+        if self.replicas and self._task is None:
+            await self.check_replicas()
+            self._task = asyncio.create_task(self._monitor(interval))
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._marks:
+            await asyncio.gather(*self._marks, return_exceptions=True)
+        if self.redis:
+            await self.redis.close()
+    
+    async def check_replicas(self):
+        healthy = []
+        for i, replica in enumerate(self.replica_engines):
+            try:
+                async with replica.connect() as conn:
+                    lag = float(await conn.scalar(self.LAG_QUERY))
+            except Exception as e:
+                logger.warning(f"Replica {i} unreachable: {e}")
+                lag = None
+            
+            if self.lag[i] is not None and (lag is None or lag > REPLICA_MAX_LAG_SECONDS):
+                logger.warning(f"Replica {i} taken out of rotation (lag={lag})")
+            self.lag[i] = lag
+            if lag is not None and lag <= REPLICA_MAX_LAG_SECONDS:
+                healthy.append(i)
+        self.healthy = healthy
+    
+    async def _monitor(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_replicas()
+            except Exception as e:
+                logger.error(f"Replica lag check failed: {e}")
+    
+    def mark_write(self, *sticky_keys: Optional[str]):
+        """Pin each sticky key's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+        keys = {str(key) for key in sticky_keys if key}
+        if not keys:
+            return
+        
+        now = time.monotonic()
+        for key in keys:
+            self._recent_writes[key] = now
+            self._recent_writes.move_to_end(key)
+        
+        # Forget keys whose window has passed, or the map grows with every writer
+        while self._recent_writes:
+            key, wrote_at = next(iter(self._recent_writes.items()))
+            if now - wrote_at < READ_YOUR_WRITES_SECONDS:
+                break
+            self._recent_writes.popitem(last=False)
+        
+        if self.redis:
+            task = asyncio.create_task(self._publish_writes(keys))
+            self._marks.add(task)
+            task.add_done_callback(self._marks.discard)
+    
+    async def _publish_writes(self, keys):
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(f"db:recent_write:{key}", 1, px=int(READ_YOUR_WRITES_SECONDS * 1000))
+        try:
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to share recent writes: {e}")
+    
+    async def wrote_recently(self, sticky_key: Optional[str]) -> bool:
+        if not sticky_key:
+            return False
+        
+        wrote_at = self._recent_writes.get(sticky_key)
+        if wrote_at is not None:
+            if time.monotonic() - wrote_at < READ_YOUR_WRITES_SECONDS:
+                return True
+            del self._recent_writes[sticky_key]
+        
+        if self.redis:
+            return bool(await self.redis.exists(f"db:recent_write:{sticky_key}"))
+        return False
+    
+    async def read_sessionmaker(self, sticky_key: Optional[str] = None):
+        """Session factory for a read-only unit of work"""
+        if not self.healthy or await self.wrote_recently(sticky_key):
+            return self.primary
+        return self.replicas[self.healthy[next(self._rotation) % len(self.healthy)]]
+
+session_router = SessionRouter(AsyncSessionLocal, AsyncSessionReplicas, replica_engines)
+
+def _sticky_key(request: Optional[Request]) -> Optional[str]:
+    user_id = getattr(request.state, "user_id", None) if request else None
+    return str(user_id) if user_id else None
+
+async def get_db(request: Request = None) -> AsyncSession:
+    """Dependency for getting database session"""
+    async with AsyncSessionLocal() as session:
+        session.info["sticky_key"] = _sticky_key(request)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+async def get_db_replica(request: Request = None) -> AsyncSession:
+    """Dependency for read-only queries (routed to a healthy replica)"""
+    factory = await session_router.read_sessionmaker(_sticky_key(request))
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+@event.listens_for(PrimarySession, "after_flush")
+def _record_write(session, flush_context):
+    """Note that this session wrote, for read-your-writes stickiness"""
+    session.info["wrote"] = True
+
+@event.listens_for(PrimarySession, "after_commit")
+def _pin_reads_after_write(session):
+    if session.info.pop("wrote", False):
+        session_router.mark_write(session.info.get("sticky_key"))
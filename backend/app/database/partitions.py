@@ -0,0 +1,162 @@
+# /backend/app/database/partitions.py
+"""
+Monthly range partitions for the messages table
+Creates partitions ahead of time and archives ones past retention
+"""
+
+import re
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from app.config import settings
+from app.database import direct_engine
+from app.models.pricing import PricingTable
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key so only one worker runs partition DDL at a time
+PARTITION_LOCK_KEY = 727_001
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"messages_p{month:%Y_%m}"
+
+def retention_horizon_days() -> Optional[int]:
+    """
+    Longest message_history_days across tiers, or None to archive nothing
+    History reads only see attached partitions, so while any tier keeps
+    unlimited history (-1) every partition stays attached
+    """
+    if settings.message_archive_after_days:
+        return settings.message_archive_after_days
+
+    days = [
+        tier['features'].get('message_history_days', -1)
+        for tier in PricingTable.TIERS.values()
+    ]
+    if not days or any(day < 0 for day in days):
+        return None
+    return max(days)
+
+class MessagePartitionManager:
+    """
+    Keeps `messages` partitioned by month
+    - ensure_future_partitions() creates the current and next N months,
+      each with its unique (room_id, seq) index, skipping months an
+      attached partition already covers
+    - archive_expired() detaches partitions whose whole range is older than
+      the retention horizon and moves them to the archive schema, replacing
+      huge retention DELETEs with a metadata-only operation
+    """
+
+    def __init__(self, months_ahead: int = 3, archive_schema: str = "archive"):
+        self.months_ahead = months_ahead
+        self.archive_schema = archive_schema
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_future_partitions(self, conn, today: Optional[date] = None):
+        month = month_start(today or datetime.utcnow().date())
+
+        # The legacy partition attached by migration 0003 runs to the end of
+        # the month it was applied in; a monthly partition there would overlap
+        covered = max((upper for _, upper in await self.list_partitions(conn) if upper), default=None)
+
+        for offset in range(self.months_ahead + 1):
+            start = add_months(month, offset)
+            end = add_months(start, 1)
+            if covered and datetime.combine(end, datetime.min.time()) <= covered:
+                continue
+            name = partition_name(start)
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} "
+                f"PARTITION OF messages FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+            # A parent-level unique index would have to include created_at
+            await conn.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_room_seq_key ON {name} (room_id, seq)"
+            ))
+
+    async def list_partitions(self, conn) -> List[Tuple[str, Optional[datetime]]]:
+        """(name, exclusive upper bound) for every attached partition"""
+        result = await conn.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'messages'::regclass"
+        ))
+
+        partitions = []
+        for name, bound in result.all():
+            upper = re.search(r"TO \('([^']+)'\)", bound or "")
+            partitions.append((name, datetime.fromisoformat(upper.group(1)) if upper else None))
+        return partitions
+
+    async def archive_expired(self, conn, now: Optional[datetime] = None):
+        horizon = retention_horizon_days()
+        if horizon is None:
+            return
+
+        cutoff = (now or datetime.utcnow()) - timedelta(days=horizon)
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.archive_schema}"))
+
+        for name, upper in await self.list_partitions(conn):
+            if upper is None or upper > cutoff:
+                continue
+
+            # CONCURRENTLY avoids an ACCESS EXCLUSIVE lock on the parent
+            await conn.execute(text(f"ALTER TABLE messages DETACH PARTITION {name} CONCURRENTLY"))
+            await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {self.archive_schema}"))
+            logger.info(f"Archived message partition {name} (older than {horizon} days)")
+
+    async def run_maintenance(self):
+        """Create upcoming partitions and archive expired ones (one worker at a time)"""
+
+        # DETACH ... CONCURRENTLY cannot run inside a transaction block, and
+        # the advisory lock is session-level, so this bypasses any pooler
+        async with direct_engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": PARTITION_LOCK_KEY}
+            )
+            if not locked:
+                return
+
+            try:
+                await self.ensure_future_partitions(conn)
+                await self.archive_expired(conn)
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITION_LOCK_KEY}
+                )
+
+    def start(self, interval: float = 86400):
+        """Run maintenance now and then every interval seconds"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await self.run_maintenance()
+            except Exception as e:
+                logger.error(f"Message partition maintenance failed: {e}")
+            await asyncio.sleep(interval)
+
+partition_manager = MessagePartitionManager(months_ahead=settings.message_partitions_ahead)
@@ -4,26 +4,55 @@ Connection pool configuration for production
 """
 
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import NullPool
+from uuid import uuid4
 import logging
+from app.database.pool_metrics import InstrumentedQueuePool, instrument_engine
 
 logger = logging.getLogger(__name__)
 
-def create_engine_with_pool(database_url: str, pool_config: dict):
+def create_engine_with_pool(
+    database_url: str, pool_config: dict, name: str = "primary", pool_mode: str = "session"
+):
     """
     Create async engine with optimized connection pool
     
     Pool sizing: pool_size + max_overflow = total connections
     - pool_size: connections kept in pool
     - max_overflow: additional connections for spikes
+    - name: label for the db_pool_* metrics
+    
+    pool_mode="transaction" is for PgBouncer in transaction pooling mode:
+    - PgBouncer owns the server connections, so no local pool (NullPool)
+      and no pre-ping (every checkout is a fresh client connection)
+    - Consecutive transactions can land on different server connections,
+      so prepared statements are not cached and get unique names
+    - PgBouncer rejects unknown startup parameters; jit is set on the
+      role instead (ALTER ROLE cgraph SET jit = off)
     """
     
+    if pool_mode == "transaction":
+        return create_async_engine(
+            database_url,
+            echo=False,
+            poolclass=NullPool,
+            connect_args={
+                "server_settings": {"application_name": "cgraph_backend"},
+                "statement_cache_size": 0,  # asyncpg's own cache
+                "prepared_statement_cache_size": 0,  # SQLAlchemy's cache
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+                "timeout": 10,
+                "command_timeout": pool_config.get("command_timeout", 10)
+            }
+        )
+    
     engine = create_async_engine(
         database_url,
         echo=False,
         
         # Connection pool settings
-        poolclass=QueuePool,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
         pool_size=pool_config.get("pool_size", 20),
         max_overflow=pool_config.get("max_overflow", 10),
         pool_timeout=pool_config.get("pool_timeout", 30),
@@ -37,10 +66,11 @@ def create_engine_with_pool(database_url: str, pool_config: dict):
                 "jit": "off"  # Disable JIT for predictable performance
             },
             "timeout": 10,
-            "command_timeout": 10
+            "command_timeout": pool_config.get("command_timeout", 10)
         }
     )
     
+    instrument_engine(engine, name)
     return engine
 
 # Configuration
@@ -48,19 +78,32 @@ POOL_CONFIG = {
     "production": {
         "pool_size": 20,
         "max_overflow": 10,
+        "overflow_limit": 40,  # Adaptive mode ceiling
         "pool_timeout": 30,
         "pool_recycle": 3600
     },
     "staging": {
         "pool_size": 10,
         "max_overflow": 5,
+        "overflow_limit": 20,
         "pool_timeout": 30,
         "pool_recycle": 3600
     },
     "development": {
         "pool_size": 5,
         "max_overflow": 5,
+        "overflow_limit": 10,
         "pool_timeout": 30,
         "pool_recycle": 3600
     }
 }
+
+# Session-level work (advisory locks, DETACH CONCURRENTLY) on a direct
+# Postgres connection when the main engines go through PgBouncer
+DIRECT_POOL_CONFIG = {
+    "pool_size": 1,
+    "max_overflow": 1,
+    "pool_timeout": 30,
+    "pool_recycle": 3600,
+    "command_timeout": 600
+}
@@ -3,42 +3,39 @@
 Database query optimization techniques
 """
 
+from sqlalchemy import select
+from app.models.message import Message
+from app.caching.room_message_cache import room_message_cache
+
 class QueryOptimizer:
     
     @staticmethod
-    async def get_messages_with_optimization(room_id: str, limit: int = 50):
+    async def get_messages_with_optimization(db, room_id: str, limit: int = 50):
         """
         Optimized query with:
-        - Eager loading of relationships
         - Pagination
         - Indexed columns
-        - Query caching
+        - Per-room hot cache (write-through from the send path, so it is
+          never stale and is shared by every page size up to its length)
         """
         
         # Check cache first
-        cache_key = f"messages:room_{room_id}:limit_{limit}"
-        cached = await cache_manager.get(cache_key)
-        if cached:
+        cached = await room_message_cache.get_latest(room_id, limit)
+        if cached is not None:
             return cached
         
-        # Query with relationships loaded
+        # Cold room (or a page bigger than the cache): fill from Postgres
+        if limit <= room_message_cache.max_messages:
+            return await room_message_cache.load(db, room_id, limit)
+        
         result = await db.execute(
             select(Message)
             .where(Message.room_id == room_id)
-            .options(
-                joinedload(Message.sender),  # Eager load sender
-                joinedload(Message.reactions)  # Eager load reactions
-            )
             .order_by(Message.created_at.desc())
             .limit(limit)
         )
         
-        messages = result.unique().scalars().all()
-        
-        # Cache result
-        await cache_manager.set(cache_key, messages, ttl=300)
-        
-        return messages
+        return [message.to_dict() for message in result.scalars().all()]
     
     @staticmethod
     def use_database_indexes():
@@ -48,8 +45,9 @@ class QueryOptimizer:
         
         # Example migrations:
         """
-        -- Messages by room
-        CREATE INDEX idx_messages_room_created ON messages(room_id, created_at DESC);
+        -- Messages by room (shipped as alembic revision 0002, with id as
+        -- the keyset tie-breaker)
+        CREATE INDEX idx_messages_room_created ON messages(room_id, created_at DESC, id DESC);
         
         -- Users by email (login)
         CREATE INDEX idx_users_email ON users(email);
@@ -1,13 +1,24 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from app.config import settings
-from app.database import engine, Base, get_db
+from app.database import get_db, session_router, dispose_engines, pool_tuner, DB_POOL_ADAPTIVE
+from app.redis_client import close_pools
 from app.api.v1 import auth, messages, rooms, forums, payments, cosmetics
 from app.middleware.rate_limiting import RateLimitMiddleware
 from app.middleware.error_handler import ErrorHandlerMiddleware
+from app.middleware.auth_context import AuthContextMiddleware
+from app.database.partitions import partition_manager
+from app.caching.room_message_cache import room_message_cache
+from app.caching.cache_manager import cache_manager
+from app.services.websocket_manager import (
+    ws_manager, typing_aggregator, message_writer, membership_cache, room_events,
+    presence, handle_membership_event, router as websocket_router
+)
+from app.services.message_queue import message_queue
 import structlog
 
 # Setup logging
@@ -30,16 +41,47 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 CGRAPH Backend Starting...")
+    await session_router.start()
+    if DB_POOL_ADAPTIVE:
+        pool_tuner.start()
+    await ws_manager.init_redis()
+    await membership_cache.initialize()
+    await message_queue.initialize()
+    membership_events = asyncio.create_task(message_queue.subscribe_to_channel(
+        'rooms', handle_membership_event, group="membership-cache"
+    ))
+    await room_events.initialize()
+    await room_message_cache.initialize()
+    await cache_manager.initialize()
+    typing_aggregator.start()
+    await presence.initialize(ws_manager.instance_id.decode())
+    presence.start()
+    await message_writer.initialize()
+    await message_writer.recover()
+    message_writer.start()
+    partition_manager.start()
     yield
     # Shutdown
     logger.info("💤 CGRAPH Backend Shutting Down...")
+    await partition_manager.stop()
+    await typing_aggregator.stop()
+    await presence.stop()
+    await message_writer.stop()
+    membership_events.cancel()
+    await asyncio.gather(membership_events, return_exceptions=True)
+    await membership_cache.close()
+    await room_events.close()
+    await room_message_cache.close()
+    await cache_manager.close()
+    await ws_manager.close()
+    await session_router.stop()
+    await pool_tuner.stop()
+    await dispose_engines()
+    await close_pools()
 
 # Initialize FastAPI
 app = FastAPI(
@@ -64,6 +106,9 @@ app.add_middleware(RateLimitMiddleware)
 # Error Handler Middleware
 app.add_middleware(ErrorHandlerMiddleware)
 
+# Caller identity for read-your-writes routing (outermost, runs first)
+app.add_middleware(AuthContextMiddleware)
+
 # Health Check Endpoint
 @app.get("/health")
 async def health_check():
@@ -81,6 +126,9 @@ app.include_router(forums.router, prefix="/api/v1/forums", tags=["Forums"])
 app.include_router(payments.router, prefix="/api/v1/payments", tags=["Payments"])
 app.include_router(cosmetics.router, prefix="/api/v1/cosmetics", tags=["Cosmetics"])
 
+# WebSocket endpoints (/ws/{room_id} and the multiplexed /ws)
+app.include_router(websocket_router)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -95,8 +143,8 @@ async def root():
 # Metrics endpoint (Prometheus)
 @app.get("/metrics")
 async def metrics():
-    from prometheus_client import generate_latest
-    return generate_latest()
+    from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 if __name__ == "__main__":
     import uvicorn
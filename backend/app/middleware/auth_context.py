@@ -0,0 +1,30 @@
+"""
+Request authentication context
+Puts the bearer token's user on request.state.user_id
+"""
+
+from app.services.auth import AuthService
+
+class AuthContextMiddleware:
+    """
+    Decodes the Authorization bearer token once per request
+    Only identifies the caller (None when absent or invalid); endpoints still
+    decide whether authentication is required. Read-your-writes routing in
+    app.database keys on request.state.user_id
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            user_id = None
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    scheme, _, token = value.decode("latin-1").partition(" ")
+                    if scheme.lower() == "bearer" and token:
+                        user_id = AuthService.verify_token(token)
+                    break
+            scope.setdefault("state", {})["user_id"] = user_id
+        
+        await self.app(scope, receive, send)
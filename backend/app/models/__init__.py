@@ -0,0 +1,7 @@
+from app.models.base import Base
+from app.models.user import User
+from app.models.session import Session
+from app.models.message import Message
+from app.models.room_member import RoomMember
+
+__all__ = ["Base", "User", "Session", "Message", "RoomMember"]
@@ -0,0 +1,9 @@
+# /backend/app/models/base.py
+"""
+Declarative base shared by every model
+One metadata registry for migrations and test fixtures
+"""
+
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
@@ -1,17 +1,20 @@
 """Message model"""
 
-from sqlalchemy import Column, String, DateTime, UUID as SQLUUID, JSON, Boolean
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, String, DateTime, UUID as SQLUUID, JSON, Boolean, BigInteger, Index
 from datetime import datetime
 import uuid
 
-Base = declarative_base()
+from app.models.base import Base
 
 class Message(Base):
     __tablename__ = "messages"
     
     id = Column(SQLUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     room_id = Column(String(255), nullable=False, index=True)
+    
+    # Per-room ordering, assigned when the message is accepted; unique per
+    # room within each partition (see app.database.partitions)
+    seq = Column(BigInteger, nullable=True)
     sender_id = Column(SQLUUID(as_uuid=True), nullable=False, index=True)
     content = Column(String(4096), nullable=False)
     
@@ -28,9 +31,31 @@ class Message(Base):
     # Reactions
     reactions = Column(JSON, default=dict)
     
-    # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Timestamps (created_at is the partition key, so it is part of the primary key)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Keyset pagination on (room_id, created_at, id)
+        Index('idx_messages_room_created', room_id, created_at.desc(), id.desc()),
+        # Monthly partitions, maintained by app.database.partitions
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+    
+    def to_dict(self) -> dict:
+        """JSON-ready representation used by the history API"""
+        return {
+            'id': str(self.id),
+            'room_id': self.room_id,
+            'seq': self.seq,
+            'sender_id': str(self.sender_id),
+            'content': self.content,
+            'media_urls': self.media_urls or [],
+            'is_encrypted': self.is_encrypted,
+            'reactions': self.reactions or {},
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+    
     def __repr__(self):
         return f"<Message(id={self.id}, room_id={self.room_id})>"
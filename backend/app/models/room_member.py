@@ -0,0 +1,19 @@
+"""Room membership model"""
+
+from sqlalchemy import Column, String, DateTime, UUID as SQLUUID
+from datetime import datetime
+
+from app.models.base import Base
+
+class RoomMember(Base):
+    __tablename__ = "room_members"
+    
+    # Primary key order serves the (room_id, user_id) connect-time check
+    room_id = Column(String(255), primary_key=True)
+    user_id = Column(SQLUUID(as_uuid=True), primary_key=True, index=True)
+    
+    # Timestamps
+    joined_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<RoomMember(room_id={self.room_id}, user_id={self.user_id})>"
@@ -0,0 +1,26 @@
+"""Session model"""
+
+from sqlalchemy import Column, String, DateTime, UUID as SQLUUID
+from datetime import datetime
+import uuid
+
+from app.models.base import Base
+
+class Session(Base):
+    __tablename__ = "sessions"
+    
+    id = Column(SQLUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(SQLUUID(as_uuid=True), nullable=False, index=True)
+    token = Column(String(500), unique=True, nullable=False)
+    device_id = Column(String(255), nullable=True)
+    device_name = Column(String(255), nullable=True)
+    ip_address = Column(String(45), nullable=True)
+    user_agent = Column(String(500), nullable=True)
+    
+    # Timestamps
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_activity_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Session(id={self.id}, user_id={self.user_id})>"
@@ -1,11 +1,10 @@
 """User model"""
 
 from sqlalchemy import Column, String, Boolean, DateTime, UUID as SQLUUID
-from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import uuid
 
-Base = declarative_base()
+from app.models.base import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -0,0 +1,124 @@
+# /backend/app/redis_client.py
+"""
+Shared Redis connection pools
+Every Redis user in the process borrows from one bounded pool
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict
+import redis.asyncio as redis
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.asyncio.retry import Retry
+from redis.backoff import EqualJitterBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.utils import HIREDIS_AVAILABLE
+from prometheus_client import Counter, Gauge, Histogram
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_POOL_IN_USE = Gauge(
+    'redis_pool_connections_in_use',
+    'Redis connections currently checked out',
+    ['pool']
+)
+REDIS_POOL_IDLE = Gauge(
+    'redis_pool_connections_idle',
+    'Open Redis connections waiting in the pool',
+    ['pool']
+)
+REDIS_POOL_MAX = Gauge(
+    'redis_pool_max_connections',
+    'Upper bound on Redis connections per pool',
+    ['pool']
+)
+REDIS_POOL_WAIT = Histogram(
+    'redis_pool_wait_seconds',
+    'Time spent waiting for a Redis connection',
+    ['pool'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+REDIS_POOL_EXHAUSTED = Counter(
+    'redis_pool_exhausted_total',
+    'Commands that gave up waiting for a Redis connection',
+    ['pool']
+)
+REDIS_RETRIES = Counter(
+    'redis_retries_total',
+    'Redis commands retried after a connection error'
+)
+
+class CountingBackoff(EqualJitterBackoff):
+    """Jittered exponential backoff (spreads reconnects during rollouts) that counts retries"""
+
+    def compute(self, failures):
+        REDIS_RETRIES.inc()
+        return super().compute(failures)
+
+class InstrumentedBlockingPool(BlockingConnectionPool):
+    """BlockingConnectionPool that times how long commands wait for a connection"""
+
+    def __init__(self, *args, pool_name: str = "default", **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait = REDIS_POOL_WAIT.labels(pool=pool_name)
+        self._exhausted = REDIS_POOL_EXHAUSTED.labels(pool=pool_name)
+
+    async def get_connection(self, command_name, *keys, **options):
+        started = time.perf_counter()
+        try:
+            return await super().get_connection(command_name, *keys, **options)
+        except ConnectionError:
+            if not self.can_get_connection():
+                self._exhausted.inc()
+            raise
+        finally:
+            self._wait.observe(time.perf_counter() - started)
+
+# decode_responses -> pool; responses are decoded per connection, so
+# clients that want str and clients that want bytes need separate pools
+_pools: Dict[bool, InstrumentedBlockingPool] = {}
+
+def _create_pool(decode_responses: bool) -> InstrumentedBlockingPool:
+    name = "str" if decode_responses else "bytes"
+
+    pool = InstrumentedBlockingPool.from_url(
+        settings.redis_url,
+        pool_name=name,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout_seconds,
+        decode_responses=decode_responses,
+        socket_connect_timeout=5,
+        socket_keepalive=True,
+        health_check_interval=30,
+        retry=Retry(CountingBackoff(cap=2.0, base=0.05), settings.redis_retries),
+        retry_on_error=[ConnectionError, TimeoutError],
+    )
+
+    REDIS_POOL_IN_USE.labels(pool=name).set_function(lambda: len(pool._in_use_connections))
+    REDIS_POOL_IDLE.labels(pool=name).set_function(lambda: len(pool._available_connections))
+    REDIS_POOL_MAX.labels(pool=name).set(settings.redis_max_connections)
+
+    logger.info(
+        f"Redis pool '{name}': max {settings.redis_max_connections} connections, "
+        f"parser={'hiredis' if HIREDIS_AVAILABLE else 'python'}"
+    )
+    return pool
+
+def redis_client(decode_responses: bool = False) -> redis.Redis:
+    """
+    Client on the shared pool
+    Closing the client does not close the pool (see close_pools).
+    Pub/sub subscribers and blocking reads hold a connection for as long
+    as they run, so redis_max_connections must leave room for them
+    """
+    if decode_responses not in _pools:
+        _pools[decode_responses] = _create_pool(decode_responses)
+    return redis.Redis(connection_pool=_pools[decode_responses])
+
+async def close_pools():
+    """Disconnect every shared pool (on shutdown, after all users closed)"""
+    pools = list(_pools.values())
+    _pools.clear()
+    await asyncio.gather(*(pool.disconnect() for pool in pools), return_exceptions=True)
@@ -59,8 +59,7 @@ class SessionManager:
         while True:
             cursor, keys = await cache.scan(cursor, match="session:*")
             
-            for key in keys:
-                session_data = await cache.get(key)
+            for session_data in await cache.mget(keys):
                 if session_data:
                     session = json.loads(session_data)
                     if session['user_id'] == user_id:
@@ -0,0 +1,118 @@
+# /backend/app/services/event_dispatcher.py
+"""
+Worker-pool dispatcher for MessageQueue subscribers
+Decouples reading events from running their handlers
+"""
+
+import time
+import zlib
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+EVENT_QUEUE_DEPTH = Gauge(
+    'event_dispatcher_queue_depth',
+    'Events waiting for a handler',
+    ['channel']
+)
+EVENT_HANDLER_LATENCY = Histogram(
+    'event_handler_latency_seconds',
+    'Time spent in event handlers',
+    ['channel']
+)
+EVENT_HANDLER_ERRORS = Counter(
+    'event_handler_errors_total',
+    'Event handlers that raised',
+    ['channel']
+)
+
+class EventDispatcher:
+    """
+    Bounded queue + fixed pool of handler workers per channel
+    - submit() blocks once max_queue events are waiting, which pauses the
+      reader instead of letting memory (or Redis buffers) grow unbounded
+    - With partition_key set, events with the same key value (e.g. user_id)
+      always go to the same worker and are handled in order; otherwise any
+      free worker takes the next event
+    - on_done(token, ok) is called after each handler, e.g. to ack stream entries
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        handler: Callable[[dict], Awaitable],
+        concurrency: int = 10,
+        max_queue: int = 1000,
+        partition_key: Optional[str] = None,
+        on_done: Optional[Callable[[Any, bool], None]] = None
+    ):
+        self.channel = channel
+        self.handler = handler
+        self.concurrency = concurrency
+        self.partition_key = partition_key
+        self.on_done = on_done
+
+        # One queue per worker when ordering matters, otherwise one shared queue
+        if partition_key:
+            per_queue = max(1, max_queue // concurrency)
+            self.queues = [asyncio.Queue(maxsize=per_queue) for _ in range(concurrency)]
+        else:
+            self.queues = [asyncio.Queue(maxsize=max_queue)]
+
+        self._workers: List[asyncio.Task] = []
+        self._depth = EVENT_QUEUE_DEPTH.labels(channel=channel)
+        self._latency = EVENT_HANDLER_LATENCY.labels(channel=channel)
+        self._errors = EVENT_HANDLER_ERRORS.labels(channel=channel)
+
+    def start(self):
+        """Start the worker pool"""
+        if self._workers:
+            return
+        for i in range(self.concurrency):
+            queue = self.queues[i % len(self.queues)]
+            self._workers.append(asyncio.create_task(self._worker(queue)))
+
+    async def stop(self):
+        """Cancel workers; queued events are dropped (stream entries stay pending)"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self.queues)
+
+    def _queue_for(self, event: dict) -> asyncio.Queue:
+        if not self.partition_key:
+            return self.queues[0]
+        key = str(event.get(self.partition_key, ""))
+        return self.queues[zlib.crc32(key.encode()) % len(self.queues)]
+
+    async def submit(self, event: dict, token: Any = None):
+        """Queue an event for handling; waits while the queue is full"""
+        await self._queue_for(event).put((event, token))
+        self._depth.inc()
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            event, token = await queue.get()
+            self._depth.dec()
+
+            ok = True
+            started = time.perf_counter()
+            try:
+                await self.handler(event)
+            except Exception as e:
+                ok = False
+                self._errors.inc()
+                logger.error(f"Error handling event on {self.channel}: {e}")
+            finally:
+                self._latency.observe(time.perf_counter() - started)
+                queue.task_done()
+
+            if self.on_done:
+                self.on_done(token, ok)
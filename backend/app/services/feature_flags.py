@@ -10,6 +10,7 @@ from typing import Dict, Optional
 from datetime import datetime
 import redis.asyncio as redis
 from app.config import settings
+from app.redis_client import redis_client
 
 class FeatureFlags:
     
@@ -138,6 +139,10 @@ class FeatureFlags:
         # Publish to analytics stream
         await self.redis.xadd('feature_usage', event)
 
+def get_feature_flags() -> FeatureFlags:
+    """Dependency: flags backed by the shared Redis pool"""
+    return FeatureFlags(redis_client())
+
 # Usage in API
 @router.get("/api/v1/features")
 async def get_enabled_features(
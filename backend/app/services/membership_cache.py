@@ -0,0 +1,130 @@
+# /backend/app/services/membership_cache.py
+"""
+Room membership authorization cache
+Keeps WebSocket connects off the database for repeat checks
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Every worker listens here and drops the (room, user) pair it names
+INVALIDATION_CHANNEL = "membership:invalidate"
+
+class MembershipCache:
+    """
+    In-process LRU of (room_id, user_id) -> is_member
+    - Positive and negative answers are cached with separate TTLs
+    - invalidate() evicts locally and broadcasts over Redis so every worker
+      drops the entry; it runs for every ROOM_MEMBER_JOINED/LEFT event the
+      rooms API publishes (see websocket_manager.handle_membership_event)
+    - The loader opens its own short-lived session, so callers never hold a
+      database connection while the answer is in use
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str], Awaitable[bool]],
+        max_entries: int = 100_000,
+        ttl: float = 300,
+        negative_ttl: float = 30
+    ):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        # (room_id, user_id) -> (is_member, monotonic expiry), oldest first
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[bool, float]]" = OrderedDict()
+
+        # Bumped on every eviction so a load racing an invalidation is not stored
+        self._evictions = 0
+
+        self.redis = None
+        self.pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def initialize(self):
+        """Connect to Redis and start listening for invalidations"""
+        self.redis = redis_client()
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.subscribe(INVALIDATION_CHANNEL)
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def close(self):
+        """Stop listening and release the Redis connection"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+        if self.pubsub:
+            await self.pubsub.close()
+            self.pubsub = None
+
+        if self.redis:
+            await self.redis.close()
+
+    async def is_member(self, room_id: str, user_id: str) -> bool:
+        """Return membership, loading and caching it on a miss or expiry"""
+
+        key = (room_id, user_id)
+        entry = self.entries.get(key)
+        if entry is not None:
+            is_member, expires_at = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                return is_member
+            del self.entries[key]
+
+        evictions = self._evictions
+        is_member = await self.loader(room_id, user_id)
+        if evictions == self._evictions:
+            self._store(key, is_member)
+        return is_member
+
+    def _store(self, key: Tuple[str, str], is_member: bool):
+        ttl = self.ttl if is_member else self.negative_ttl
+        self.entries[key] = (is_member, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def evict(self, room_id: str, user_id: str):
+        """Drop a cached answer in this process only"""
+        self._evictions += 1
+        self.entries.pop((room_id, user_id), None)
+
+    async def invalidate(self, room_id: str, user_id: str):
+        """Drop a cached answer on every worker (call on join and leave)"""
+        self.evict(room_id, user_id)
+        if self.redis:
+            await self.redis.publish(INVALIDATION_CHANNEL, f"{room_id}\n{user_id}")
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0
+                )
+                if message is None or message['type'] != 'message':
+                    continue
+
+                room_id, _, user_id = message['data'].decode().partition("\n")
+                self.evict(room_id, user_id)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Membership invalidation listener error: {e}")
+                await asyncio.sleep(1)
@@ -0,0 +1,364 @@
+# /backend/app/services/message_persistence.py
+"""
+Write-behind persistence for chat messages
+Messages are broadcast immediately and stored in batches
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+import orjson
+from redis.exceptions import ResponseError
+from app.redis_client import redis_client
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from app.database import AsyncSessionLocal, session_router
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+# Redis stream holding messages accepted but not yet committed to Postgres
+JOURNAL_KEY = "messages:journal"
+
+# Every writer is a consumer in this group; an entry sits in the pending
+# list of the writer that buffered it until its batch commits
+JOURNAL_GROUP = "writers"
+
+# Records Postgres rejected (constraint or data errors), kept for inspection
+DEAD_LETTER_KEY = f"{JOURNAL_KEY}:dead"
+
+# Longest content the messages.content column accepts
+MAX_CONTENT_LENGTH = Message.__table__.c.content.type.length
+
+class MessageRejected(ValueError):
+    """Raised by submit() for content the database would never accept"""
+
+class WriterOverloaded(RuntimeError):
+    """Raised by submit() while max_pending messages are waiting for Postgres"""
+
+# Assign the room's next sequence number and journal the record in one round trip.
+# The counter has no TTL but can still be evicted (allkeys-lru); when it is
+# missing the script returns nil until the caller passes ARGV[2], the highest
+# seq stored in Postgres, and then continues from that or from the highest
+# seq still in the room's resume buffer (KEYS[3]), whichever is larger
+SUBMIT_SCRIPT = """
+-- The journal can be evicted once drained, taking the group with it. Bail out
+-- before writing anything: Lua would not undo the INCR/XADD if XREADGROUP
+-- then failed with NOGROUP
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    if ARGV[2] == '' then
+        return false
+    end
+    local seed = tonumber(ARGV[2])
+    local newest = redis.call('ZRANGE', KEYS[3], -1, -1, 'WITHSCORES')
+    if newest[2] and tonumber(newest[2]) > seed then
+        seed = tonumber(newest[2])
+    end
+    redis.call('SET', KEYS[1], seed, 'NX')
+end
+local seq = redis.call('INCR', KEYS[1])
+local entry_id = redis.call('XADD', KEYS[2], '*', 'record', ARGV[1], 'seq', seq)
+-- Deliver it to this writer (group ARGV[3], consumer ARGV[4]) at once. Every
+-- writer does the same, so '>' holds just this entry (plus any that older
+-- code left undelivered, which are then recovered like a crashed writer's)
+redis.call('XREADGROUP', 'GROUP', ARGV[3], ARGV[4], 'STREAMS', KEYS[2], '>')
+return {seq, entry_id}
+"""
+
+class MessageWriter:
+    """
+    Batched message writer
+    - IDs, timestamps and per-room sequence numbers are assigned up front,
+      so callers can broadcast before the row exists
+    - Every accepted message is journaled to a Redis stream first and removed
+      once its batch commits. The entry is owned by this writer (consumer
+      group pending list), so recover() only takes over entries that no
+      writer has acknowledged for recover_idle, i.e. a crashed worker's,
+      never ones a live writer still has buffered
+    - Batches are flushed on size (batch_size) or age (flush_interval)
+    - Inserts use ON CONFLICT DO NOTHING so replays are idempotent
+    - A batch Postgres rejects for its data is split in halves until the
+      offending rows are isolated; those go to DEAD_LETTER_KEY instead of
+      blocking every later batch. Other errors keep the batch for a retry,
+      and submit() refuses new messages once max_pending are waiting
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 0.05,
+        on_persisted: Optional[Callable[[List[dict]], Awaitable]] = None,
+        recover_idle: float = 60.0,
+        recover_interval: float = 30.0,
+        max_pending: int = 10_000
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_persisted = on_persisted
+        self.recover_idle = recover_idle
+        self.recover_interval = recover_interval
+        self.max_pending = max_pending
+
+        self.redis = None
+        self.consumer_name = uuid.uuid4().hex
+
+        # (journal entry ID, record) pairs waiting for the next flush
+        self.pending: List[Tuple[bytes, dict]] = []
+
+        self._submit = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def initialize(self):
+        """Connect to Redis for the journal"""
+        self.redis = redis_client()
+        self._submit = self.redis.register_script(SUBMIT_SCRIPT)
+        await self._ensure_group()
+
+    async def _ensure_group(self):
+        """Create the journal and its group (again, if the stream was evicted)"""
+        try:
+            await self.redis.xgroup_create(JOURNAL_KEY, JOURNAL_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out anything still buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+    async def submit(
+        self,
+        room_id: str,
+        sender_id: str,
+        content: str,
+        is_encrypted: bool = False,
+        client_id: Optional[str] = None
+    ) -> dict:
+        """
+        Accept a message for persistence
+        Returns the record (with its final ID and timestamp) as soon as it is
+        journaled; the database write happens in the background
+        Raises MessageRejected for content that cannot be stored and
+        WriterOverloaded while Postgres is not keeping up
+        """
+
+        if not isinstance(content, str) or len(content) > MAX_CONTENT_LENGTH:
+            raise MessageRejected(f"Content must be text of at most {MAX_CONTENT_LENGTH} characters")
+        if "\x00" in content:
+            raise MessageRejected("Content must not contain NUL characters")
+        if len(self.pending) >= self.max_pending:
+            raise WriterOverloaded(f"{len(self.pending)} messages waiting to be stored")
+
+        record = {
+            'id': str(uuid.uuid4()),
+            'room_id': room_id,
+            'sender_id': sender_id,
+            'content': content,
+            'is_encrypted': is_encrypted,
+            'created_at': datetime.utcnow().isoformat(),
+            'client_id': client_id,
+        }
+
+        keys = [f"room:{room_id}:seq", JOURNAL_KEY, f"room:{room_id}:events"]
+        payload = orjson.dumps(record)
+        owner = [JOURNAL_GROUP, self.consumer_name]
+        result = await self._submit(keys=keys, args=[payload, "", *owner])
+        if result == 0:
+            # The journal was evicted; recreate it with the group and retry
+            await self._ensure_group()
+            result = await self._submit(keys=keys, args=[payload, "", *owner])
+        if result is None:
+            # New room, or its counter was evicted: never reuse a stored seq
+            seed = await self._max_seq(room_id)
+            result = await self._submit(keys=keys, args=[payload, seed, *owner])
+
+        seq, entry_id = result
+        record['seq'] = seq
+
+        self.pending.append((entry_id, record))
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+        return record
+
+    async def _max_seq(self, room_id: str) -> int:
+        """Highest seq persisted for the room (0 if none)"""
+        async with AsyncSessionLocal() as session:
+            seq = await session.scalar(
+                select(func.max(Message.seq)).where(Message.room_id == room_id)
+            )
+        return seq or 0
+
+    async def recover(self):
+        """
+        Replay journal entries left behind by a crashed or killed worker
+        Only entries unacknowledged for recover_idle are claimed (XAUTOCLAIM);
+        live writers commit theirs within a flush interval
+        """
+
+        await self._ensure_group()
+
+        replayed = 0
+        start = "0-0"
+        while True:
+            start, entries, *_ = await self.redis.xautoclaim(
+                JOURNAL_KEY,
+                JOURNAL_GROUP,
+                self.consumer_name,
+                min_idle_time=int(self.recover_idle * 1000),
+                start_id=start,
+                count=self.batch_size
+            )
+
+            batch = [
+                (entry_id, {**orjson.loads(fields[b'record']), 'seq': int(fields[b'seq'])})
+                for entry_id, fields in entries
+                if fields
+            ]
+            if batch:
+                await self._write_isolating(batch)
+                replayed += len(batch)
+
+            if start in (b"0-0", "0-0"):
+                break
+
+        if replayed:
+            logger.info(f"Replayed {replayed} journaled messages")
+
+        await self._forget_idle_writers()
+
+    async def _forget_idle_writers(self):
+        """Drop group consumers with nothing pending (workers that have gone away)"""
+        for consumer in await self.redis.xinfo_consumers(JOURNAL_KEY, JOURNAL_GROUP):
+            name = consumer['name']
+            if (
+                name != self.consumer_name.encode()
+                and consumer['pending'] == 0
+                and consumer['idle'] > self.recover_idle * 1000
+            ):
+                # A live but quiet writer is re-created by its next submit
+                await self.redis.xgroup_delconsumer(JOURNAL_KEY, JOURNAL_GROUP, name)
+
+    async def flush(self):
+        """Write buffered messages as multi-row INSERTs of up to batch_size rows"""
+
+        async with self._flush_lock:
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                del self.pending[:len(batch)]
+                await self._write_isolating(batch)
+
+    async def _write_isolating(self, batch: List[Tuple[bytes, dict]]):
+        """
+        Write batch, halving it around rows Postgres rejects (NUL bytes,
+        oversized content, a duplicate (room_id, seq)) and dead-lettering
+        them; on any other error the unwritten rest goes back to pending
+        """
+
+        chunks = [batch]
+        while chunks:
+            chunk = chunks.pop(0)
+            try:
+                await self._write(chunk)
+            except (DataError, IntegrityError) as e:
+                if len(chunk) == 1:
+                    await self._dead_letter(chunk[0], e)
+                else:
+                    half = len(chunk) // 2
+                    chunks[:0] = [chunk[:half], chunk[half:]]
+            except Exception:
+                # Keep order; the journal still holds these if we die
+                self.pending[:0] = [item for rest in (chunk, *chunks) for item in rest]
+                raise
+
+    async def _dead_letter(self, item: Tuple[bytes, dict], error: Exception):
+        entry_id, record = item
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xadd(DEAD_LETTER_KEY, {
+            'record': orjson.dumps(record),
+            'error': str(getattr(error, 'orig', error))[:1000],
+        })
+        pipe.xack(JOURNAL_KEY, JOURNAL_GROUP, entry_id)
+        pipe.xdel(JOURNAL_KEY, entry_id)
+        await pipe.execute()
+        logger.error(f"Dead-lettered message {record['id']} in room {record['room_id']}: {error}")
+
+    async def _write(self, batch: List[Tuple[bytes, dict]]):
+        rows = [
+            {
+                'id': uuid.UUID(record['id']),
+                'room_id': record['room_id'],
+                'seq': record['seq'],
+                'sender_id': record['sender_id'],
+                'content': record['content'],
+                'is_encrypted': record['is_encrypted'],
+                'media_urls': [],
+                'reactions': {},
+                'is_deleted': False,
+                'created_at': datetime.fromisoformat(record['created_at']),
+                'updated_at': datetime.fromisoformat(record['created_at']),
+            }
+            for _, record in batch
+        ]
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                insert(Message).on_conflict_do_nothing(index_elements=['id', 'created_at']),
+                rows
+            )
+            await session.commit()
+
+        # Senders read their own messages back from the primary for a while
+        session_router.mark_write(*{record['sender_id'] for _, record in batch})
+
+        entry_ids = [entry_id for entry_id, _ in batch]
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(JOURNAL_KEY, JOURNAL_GROUP, *entry_ids)
+        pipe.xdel(JOURNAL_KEY, *entry_ids)
+        await pipe.execute()
+
+        if self.on_persisted:
+            try:
+                await self.on_persisted([record for _, record in batch])
+            except Exception as e:
+                logger.error(f"Persisted-message callback failed: {e}")
+
+    async def _run(self):
+        last_recover = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self.flush()
+                if time.monotonic() - last_recover >= self.recover_interval:
+                    last_recover = time.monotonic()
+                    await self.recover()
+            except Exception as e:
+                logger.error(f"Message batch flush failed: {e}")
+                await asyncio.sleep(1)
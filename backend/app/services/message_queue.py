@@ -1,33 +1,54 @@
 # /backend/app/services/message_queue.py
 """
-Redis pub/sub for background jobs and event streaming
+Redis Streams event bus for background jobs and event streaming
 Allows horizontal scaling without coupling
 """
 
+import os
 import json
+import time
+import socket
 import asyncio
-from typing import Callable, Dict
-import redis.asyncio as redis
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+from app.redis_client import redis_client
+from redis.exceptions import ResponseError
 from app.config import settings
+from app.services.event_dispatcher import EventDispatcher
 import logging
 
 logger = logging.getLogger(__name__)
 
 class MessageQueue:
     """
-    Publish-subscribe message queue
+    Event bus for background jobs and event streaming
     - Sends notifications asynchronously
     - Scales to multiple server instances
-    - Survives temporary disconnections
+    - Survives temporary disconnections (streams backend): events are kept
+      in a Redis stream per channel and read through consumer groups, so a
+      subscriber that is down picks up where its group left off
+    - At-least-once delivery: entries are acknowledged only after the handler
+      succeeds, and entries left pending by a dead consumer are reclaimed
+    
+    backend="pubsub" keeps the old fire-and-forget PUBLISH/SUBSCRIBE path
     """
     
-    def __init__(self):
+    def __init__(self, backend: str = "streams"):
+        self.backend = backend
         self.redis_client = None
         self.subscribers: Dict[str, Callable] = {}
+        self.dispatchers: Dict[str, EventDispatcher] = {}
+        
+        # Unique per process so pending entries can be traced to their owner
+        self.consumer_name = f"{socket.gethostname()}-{os.getpid()}"
     
     async def initialize(self):
         """Connect to Redis"""
-        self.redis_client = await redis.from_url(settings.REDIS_URL)
+        self.redis_client = redis_client()
+    
+    @staticmethod
+    def _stream(channel: str) -> str:
+        return f"events:{channel}"
     
     async def publish_event(self, channel: str, event: dict):
         """Publish event to channel"""
@@ -38,18 +59,69 @@ class MessageQueue:
             **event
         }
         
-        await self.redis_client.publish(channel, json.dumps(message))
+        if self.backend == "streams":
+            await self.redis_client.xadd(
+                self._stream(channel),
+                {'data': json.dumps(message)},
+                maxlen=settings.event_stream_maxlen,
+                approximate=True
+            )
+        else:
+            await self.redis_client.publish(channel, json.dumps(message))
         logger.info(f"Published to {channel}: {event['type']}")
     
     async def subscribe_to_channel(
         self,
         channel: str,
-        handler: Callable
+        handler: Callable,
+        group: str = "default",
+        concurrency: Optional[int] = None,
+        partition_key: Optional[str] = None,
+        max_queue: Optional[int] = None
     ):
-        """Subscribe to channel with handler"""
+        """
+        Subscribe to channel with handler
+        Events are handed to a worker pool (see EventDispatcher), so a slow
+        handler never stalls reading the channel. Pass partition_key
+        (e.g. 'user_id') to keep per-key ordering.
+        With the streams backend, every consumer group receives each event
+        once; consumers in the same group share the work
+        """
         
         self.subscribers[channel] = handler
         
+        # Stream entry IDs whose handlers succeeded, acked before the next read
+        acks: List[bytes] = []
+        
+        # Entry IDs queued or running here; never reclaimed from ourselves
+        inflight: Set[bytes] = set()
+        
+        def on_done(entry_id, ok: bool):
+            inflight.discard(entry_id)
+            if ok and entry_id is not None:
+                acks.append(entry_id)
+        
+        dispatcher = EventDispatcher(
+            channel,
+            handler,
+            concurrency=concurrency or settings.event_handler_concurrency,
+            max_queue=max_queue or settings.event_dispatch_queue_size,
+            partition_key=partition_key,
+            on_done=on_done
+        )
+        self.dispatchers[channel] = dispatcher
+        dispatcher.start()
+        
+        try:
+            if self.backend == "streams":
+                await self._consume_stream(channel, group, dispatcher, acks, inflight)
+            else:
+                await self._consume_pubsub(channel, dispatcher)
+        finally:
+            await dispatcher.stop()
+            self.dispatchers.pop(channel, None)
+    
+    async def _consume_pubsub(self, channel: str, dispatcher: EventDispatcher):
         # Create pub/sub connection
         pubsub = self.redis_client.pubsub()
         await pubsub.subscribe(channel)
@@ -59,9 +131,132 @@ class MessageQueue:
             if message['type'] == 'message':
                 try:
                     event = json.loads(message['data'])
-                    await handler(event)
                 except Exception as e:
-                    logger.error(f"Error handling event: {e}")
+                    logger.error(f"Error decoding event: {e}")
+                    continue
+                await dispatcher.submit(event)
+    
+    async def _ensure_group(self, stream: str, group: str):
+        try:
+            await self.redis_client.xgroup_create(stream, group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+    
+    async def _consume_stream(
+        self,
+        channel: str,
+        group: str,
+        dispatcher: EventDispatcher,
+        acks: List[bytes],
+        inflight: Set[bytes]
+    ):
+        stream = self._stream(channel)
+        needs_group = True
+        last_reclaim = 0.0
+        
+        while True:
+            try:
+                if needs_group:
+                    await self._ensure_group(stream, group)
+                    needs_group = False
+                
+                if acks:
+                    done = acks[:]
+                    del acks[:len(done)]
+                    await self.redis_client.xack(stream, group, *done)
+                
+                if time.monotonic() - last_reclaim >= settings.event_reclaim_interval_seconds:
+                    await self._reclaim(stream, group, dispatcher, inflight)
+                    last_reclaim = time.monotonic()
+                
+                # Short block while any entry is queued, running or awaiting
+                # its ack, so acks are not held back behind a long block
+                response = await self.redis_client.xreadgroup(
+                    group,
+                    self.consumer_name,
+                    {stream: ">"},
+                    count=settings.event_batch_size,
+                    block=100 if dispatcher.depth or acks or inflight else settings.event_block_ms
+                )
+                for _, entries in response or []:
+                    await self._dispatch(entries, dispatcher, inflight)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Typically NOGROUP: the stream was evicted, taking the group
+                # with it. Re-creating an existing group is a no-op
+                if isinstance(e, ResponseError):
+                    needs_group = True
+                logger.error(f"Error reading {stream}: {e}")
+                await asyncio.sleep(1)
+    
+    async def _dispatch(self, entries: List, dispatcher: EventDispatcher, inflight: Set[bytes]):
+        """Queue stream entries for the worker pool; blocks while it is full"""
+        for entry_id, fields in entries:
+            try:
+                event = json.loads(fields[b'data'])
+            except Exception as e:
+                # Left pending; dead-lettered by the reclaim pass
+                logger.error(f"Error decoding event {entry_id}: {e}")
+                continue
+            inflight.add(entry_id)
+            await dispatcher.submit(event, token=entry_id)
+    
+    async def _reclaim(
+        self,
+        stream: str,
+        group: str,
+        dispatcher: EventDispatcher,
+        inflight: Set[bytes]
+    ):
+        """
+        Take over entries another consumer left pending for too long
+        Entries delivered max_deliveries times go to the dead-letter stream
+        """
+        
+        pending = await self.redis_client.xpending_range(
+            stream,
+            group,
+            min="-",
+            max="+",
+            count=settings.event_batch_size,
+            idle=settings.event_reclaim_idle_ms
+        )
+        if not pending:
+            return
+        
+        deliveries = {
+            p['message_id']: p['times_delivered']
+            for p in pending
+            if p['message_id'] not in inflight
+        }
+        if not deliveries:
+            return
+        
+        claimed = await self.redis_client.xclaim(
+            stream,
+            group,
+            self.consumer_name,
+            min_idle_time=settings.event_reclaim_idle_ms,
+            message_ids=list(deliveries)
+        )
+        
+        retry = []
+        for entry_id, fields in claimed:
+            if fields is None:
+                continue  # Trimmed from the stream meanwhile
+            if deliveries.get(entry_id, 0) >= settings.event_max_deliveries:
+                await self.redis_client.xadd(f"{stream}:dead", fields)
+                await self.redis_client.xack(stream, group, entry_id)
+                logger.error(f"Dead-lettered event {entry_id} from {stream}")
+            else:
+                retry.append((entry_id, fields))
+        
+        if retry:
+            logger.warning(f"Reclaimed {len(retry)} pending events from {stream}")
+            await self._dispatch(retry, dispatcher, inflight)
 
 # Event types to publish
 class Events:
@@ -70,6 +265,11 @@ class Events:
     USER_UPDATED = "user.updated"
     USER_DELETED = "user.deleted"
     
+    # Room events, published on 'rooms' by the rooms API; also consumed by
+    # websocket_manager.handle_membership_event to invalidate the membership cache
+    ROOM_MEMBER_JOINED = "room.member_joined"
+    ROOM_MEMBER_LEFT = "room.member_left"
+    
     # Message events
     MESSAGE_SENT = "message.sent"
     MESSAGE_EDITED = "message.edited"
@@ -85,7 +285,7 @@ class Events:
     MAINTENANCE_END = "system.maintenance_end"
 
 # Initialize
-message_queue = MessageQueue()
+message_queue = MessageQueue(backend=settings.event_bus_backend)
 
 # Handlers
 async def handle_user_registered(event: dict):
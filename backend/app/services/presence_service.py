@@ -0,0 +1,266 @@
+# /backend/app/services/presence_service.py
+"""
+Presence tracking across instances
+Heartbeat-driven online/away state with batched per-room diffs
+"""
+
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+ONLINE = "online"
+AWAY = "away"
+OFFLINE = "offline"
+
+class PresenceService:
+    """
+    Redis layout (everything expires unless refreshed):
+    - presence:user:{user_id}  hash, one field per instance -> online|away
+    - presence:room:{room_id}  sorted set, user_id scored by expiry time
+    - presence:member:{room_id}:{user_id}  hash, one field per instance
+      whose sockets follow the room
+
+    Each instance tracks only its own sockets in memory. Heartbeats,
+    joins and leaves update that local state; a ticker then writes Redis in
+    pipelined rounds and pushes at most one 'presence' diff per room per tick.
+    Online transitions come from ZADD adding a new member and offline ones
+    from a successful ZREM, so when several instances race exactly one of
+    them reports the change. An instance whose user leaves a room only
+    removes them once no other instance's field is left in the member hash. Users whose records expired (e.g. their
+    instance died) are swept from the rooms this instance serves.
+    """
+
+    def __init__(
+        self,
+        rooms_for_user: Callable[[str], Set[str]],
+        broadcast: Callable[[str, dict], Awaitable],
+        interval: float = 1.0,
+        ttl: int = 60
+    ):
+        self.rooms_for_user = rooms_for_user
+        self.broadcast = broadcast
+        self.interval = interval
+        self.ttl = ttl
+        self.instance_id = None
+        self.redis = None
+
+        # User ID -> {'state', 'last_heartbeat', 'refreshed_at'} for local sockets
+        self.local: Dict[str, dict] = {}
+
+        # Room ID -> state -> users, pushed on the next tick
+        self._diffs: Dict[str, Dict[str, Set[str]]] = {}
+
+        # Pending Redis work for the next tick
+        self._dirty: Set[str] = set()
+        self._left: Set[Tuple[str, str]] = set()
+        self._gone: Dict[str, Set[str]] = {}
+
+        self._last_sweep = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def initialize(self, instance_id: str):
+        """Connect to Redis; instance_id names this worker's hash field"""
+        self.instance_id = instance_id
+        self.redis = redis_client()
+
+    def start(self):
+        """Start the flush ticker"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the ticker and withdraw everything this instance advertises"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for user_id in list(self.local):
+            self.disconnected(user_id, self.rooms_for_user(user_id))
+        await self.flush()
+
+        if self.redis:
+            await self.redis.close()
+
+    @staticmethod
+    def _user_key(user_id: str) -> str:
+        return f"presence:user:{user_id}"
+
+    @staticmethod
+    def _room_key(room_id: str) -> str:
+        return f"presence:room:{room_id}"
+
+    @staticmethod
+    def _member_key(room_id: str, user_id: str) -> str:
+        return f"presence:member:{room_id}:{user_id}"
+
+    def _diff(self, room_id: str, state: str, user_id: str):
+        room = self._diffs.setdefault(room_id, {ONLINE: set(), AWAY: set(), OFFLINE: set()})
+        for users in room.values():
+            users.discard(user_id)
+        room[state].add(user_id)
+
+    def heartbeat(self, user_id: str, state: str = ONLINE):
+        """Record a heartbeat (or a new connection) from a local socket"""
+
+        state = AWAY if state == AWAY else ONLINE
+        entry = self.local.get(user_id)
+
+        if entry is None:
+            entry = {'state': state, 'refreshed_at': 0.0}
+            self.local[user_id] = entry
+            self._gone.pop(user_id, None)
+            self._dirty.add(user_id)
+        elif entry['state'] != state:
+            entry['state'] = state
+            self._dirty.add(user_id)
+            for room_id in self.rooms_for_user(user_id):
+                self._diff(room_id, state, user_id)
+
+        entry['last_heartbeat'] = time.monotonic()
+
+    def joined(self, room_id: str, user_id: str):
+        """A local socket of user_id started following room_id"""
+        self._left.discard((room_id, user_id))
+        self._dirty.add(user_id)
+
+    def left(self, room_id: str, user_id: str):
+        """
+        A local socket of user_id stopped following room_id
+        The user goes offline in the room only if no other local socket or
+        other instance still follows it (checked on flush)
+        """
+        if room_id not in self.rooms_for_user(user_id):
+            self._left.add((room_id, user_id))
+
+    def disconnected(self, user_id: str, rooms: Set[str]):
+        """The user's last local socket closed; rooms are the ones it followed"""
+        if self.local.pop(user_id, None) is None:
+            return
+        self._dirty.discard(user_id)
+        self._gone[user_id] = set(rooms)
+
+    async def online_count(self, room_id: str) -> int:
+        """Users with a live presence record in the room, across all instances"""
+        return await self.redis.zcount(self._room_key(room_id), time.time(), "+inf")
+
+    async def online_users(self, room_id: str) -> List[str]:
+        """Snapshot for a watcher that just joined; diffs follow"""
+        members = await self.redis.zrangebyscore(self._room_key(room_id), time.time(), "+inf")
+        return [member.decode() for member in members]
+
+    async def flush(self):
+        """Write pending presence changes to Redis and push one diff per room"""
+
+        now = time.monotonic()
+        now_wall = time.time()
+
+        # Round 1: refresh, leave, withdraw and look for expired members.
+        # callbacks[i] handles the result of the i-th queued command.
+        pipe = self.redis.pipeline(transaction=False)
+        callbacks = []
+
+        for user_id, entry in self.local.items():
+            # Silent sockets are left to expire
+            if now - entry['last_heartbeat'] > self.ttl:
+                continue
+            if user_id not in self._dirty and now - entry['refreshed_at'] < self.ttl / 3:
+                continue
+            entry['refreshed_at'] = now
+
+            user_key = self._user_key(user_id)
+            pipe.hset(user_key, self.instance_id, entry['state'])
+            pipe.expire(user_key, self.ttl)
+            callbacks += [None, None]
+            for room_id in self.rooms_for_user(user_id):
+                member_key = self._member_key(room_id, user_id)
+                pipe.hset(member_key, self.instance_id, 1)
+                pipe.expire(member_key, self.ttl)
+                pipe.zadd(self._room_key(room_id), {user_id: now_wall + self.ttl})
+                callbacks += [
+                    None,
+                    None,
+                    lambda added, r=room_id, u=user_id, s=entry['state']: added and self._diff(r, s, u)
+                ]
+        self._dirty.clear()
+
+        # Leaving this instance is only going offline if no other instance
+        # still has the user in the room
+        offline: List[Tuple[str, str]] = []
+        left = set(self._left)
+        self._left.clear()
+
+        gone, self._gone = self._gone, {}
+        for user_id, rooms in gone.items():
+            pipe.hdel(self._user_key(user_id), self.instance_id)
+            callbacks.append(None)
+            left.update((room_id, user_id) for room_id in rooms)
+
+        for room_id, user_id in left:
+            member_key = self._member_key(room_id, user_id)
+            pipe.hdel(member_key, self.instance_id)
+            pipe.hlen(member_key)
+            callbacks += [
+                None,
+                lambda remaining, r=room_id, u=user_id: remaining or offline.append((r, u))
+            ]
+
+        # Sweeping every tick would cost a command per room per second
+        sweep = now - self._last_sweep >= self.ttl / 3
+        if sweep:
+            self._last_sweep = now
+            for room_id in self._local_rooms():
+                pipe.zrangebyscore(self._room_key(room_id), "-inf", now_wall)
+                callbacks.append(
+                    lambda members, r=room_id: offline.extend((r, m.decode()) for m in members)
+                )
+
+        if callbacks:
+            for result, callback in zip(await pipe.execute(), callbacks):
+                if callback:
+                    callback(result)
+
+        # Round 2: drop users that are offline everywhere
+        if offline:
+            pipe = self.redis.pipeline(transaction=False)
+            for room_id, user_id in offline:
+                pipe.zrem(self._room_key(room_id), user_id)
+            for (room_id, user_id), removed in zip(offline, await pipe.execute()):
+                if removed:
+                    self._diff(room_id, OFFLINE, user_id)
+
+        diffs, self._diffs = self._diffs, {}
+        for room_id, states in diffs.items():
+            if not any(states.values()):
+                continue
+            try:
+                await self.broadcast(room_id, {
+                    'type': 'presence',
+                    'room_id': room_id,
+                    ONLINE: sorted(states[ONLINE]),
+                    AWAY: sorted(states[AWAY]),
+                    OFFLINE: sorted(states[OFFLINE]),
+                })
+            except Exception as e:
+                logger.error(f"Failed to broadcast presence: {e}")
+
+    def _local_rooms(self) -> Set[str]:
+        rooms = set()
+        for user_id in self.local:
+            rooms |= self.rooms_for_user(user_id)
+        return rooms
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Presence flush failed: {e}")
@@ -0,0 +1,76 @@
+# /backend/app/services/room_events.py
+"""
+Short per-room buffer of recent sequenced events
+Lets reconnecting clients resume from their last seen sequence number
+"""
+
+import logging
+from typing import List, Optional
+import orjson
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+class RoomEventBuffer:
+    """
+    Redis sorted set per room, scored by sequence number
+    - append() stores the already-encoded frame, trims to the newest
+      max_events and refreshes the key's TTL in one pipelined round trip
+    - since() returns the frames after last_seq, or None when the buffer no
+      longer reaches back that far (the client must refetch history)
+    """
+
+    def __init__(self, max_events: int = 500, ttl: int = 3600):
+        self.max_events = max_events
+        self.ttl = ttl
+        self.redis = None
+
+    async def initialize(self):
+        """Connect to Redis"""
+        self.redis = redis_client()
+
+    async def close(self):
+        if self.redis:
+            await self.redis.close()
+
+    @staticmethod
+    def _key(room_id: str) -> str:
+        return f"room:{room_id}:events"
+
+    async def append(self, room_id: str, seq: int, payload: bytes):
+        """Record an encoded frame under its room sequence number"""
+
+        key = self._key(room_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(key, {payload: seq})
+        pipe.zremrangebyrank(key, 0, -(self.max_events + 1))
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def since(self, room_id: str, last_seq: int) -> Optional[List[bytes]]:
+        """Frames with seq > last_seq in order, or None if some were already trimmed"""
+
+        key = self._key(room_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.zrangebyscore(key, f"({last_seq}", "+inf")
+        oldest, events = await pipe.execute()
+
+        if not oldest:
+            # Nothing buffered: fine if the client is already current. A
+            # missing counter proves nothing (it may have been evicted)
+            current = await self.redis.get(f"room:{room_id}:seq")
+            return [] if current is not None and int(current) <= last_seq else None
+
+        if int(oldest[0][1]) > last_seq + 1:
+            return None
+
+        return events
+
+def resumed_frame(room_id: str, events: List[bytes]) -> str:
+    """
+    Batch replayed frames into one 'resumed' frame
+    The buffered payloads are spliced in as-is rather than re-encoded
+    """
+    header = '{"type":"resumed","room_id":' + orjson.dumps(room_id).decode() + ',"events":['
+    return header + b",".join(events).decode() + "]}"
@@ -0,0 +1,117 @@
+# /backend/app/services/typing_indicator.py
+"""
+Typing indicator aggregation
+Collapses per-keystroke typing frames into one diff per room per tick
+"""
+
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class TypingAggregator:
+    """
+    Per-room typing state with coalesced broadcasts
+    - Repeated typing frames only refresh a user's expiry
+    - Each tick emits at most one frame per room, and only when the set of
+      typists changed
+    - Typists that go quiet expire without needing a stop event
+
+    Frames are diffs ({'started': [...], 'stopped': [...]}) so rooms spread
+    across several instances merge cleanly on the client.
+    """
+
+    def __init__(
+        self,
+        broadcast: Callable[[str, dict], Awaitable],
+        interval: float = 0.3,
+        ttl: float = 6.0
+    ):
+        self.broadcast = broadcast
+        self.interval = interval
+        self.ttl = ttl
+
+        # Room ID -> User ID -> monotonic expiry
+        self.typists: Dict[str, Dict[str, float]] = {}
+
+        # Room ID -> pending changes since the last tick
+        self._started: Dict[str, Set[str]] = {}
+        self._stopped: Dict[str, Set[str]] = {}
+
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the flush ticker"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush ticker"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def update(self, room_id: str, user_id: str, is_typing: bool):
+        """Record a typing frame; never broadcasts directly"""
+
+        room = self.typists.setdefault(room_id, {})
+
+        if is_typing:
+            if user_id not in room:
+                self._mark(room_id, user_id, started=True)
+            room[user_id] = time.monotonic() + self.ttl
+        elif room.pop(user_id, None) is not None:
+            self._mark(room_id, user_id, started=False)
+
+        if not room:
+            del self.typists[room_id]
+
+    def _mark(self, room_id: str, user_id: str, started: bool):
+        added, removed = (self._started, self._stopped) if started else (self._stopped, self._started)
+
+        # A start and a stop inside the same window cancel out
+        if user_id in removed.get(room_id, ()):
+            removed[room_id].discard(user_id)
+            return
+        added.setdefault(room_id, set()).add(user_id)
+
+    def _expire(self, now: float):
+        for room_id in list(self.typists):
+            room = self.typists[room_id]
+            for user_id, expires_at in list(room.items()):
+                if expires_at <= now:
+                    self.update(room_id, user_id, False)
+
+    async def flush(self):
+        """Expire stale typists and emit one diff per changed room"""
+
+        self._expire(time.monotonic())
+
+        started, self._started = self._started, {}
+        stopped, self._stopped = self._stopped, {}
+
+        for room_id in set(started) | set(stopped):
+            frame = {
+                'type': 'typing',
+                'room_id': room_id,
+                'started': sorted(started.get(room_id, ())),
+                'stopped': sorted(stopped.get(room_id, ())),
+            }
+            if not frame['started'] and not frame['stopped']:
+                continue
+
+            try:
+                await self.broadcast(room_id, frame)
+            except Exception as e:
+                logger.error(f"Failed to broadcast typing state: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
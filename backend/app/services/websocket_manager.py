@@ -4,12 +4,92 @@ WebSocket connection management for real-time messaging
 Uses pub/sub for horizontal scalability
 """
 
-import json
+import uuid
 import asyncio
-from typing import Dict, Set, Callable
-from fastapi import WebSocket
-import redis.asyncio as redis
+import logging
+from typing import Dict, Set, Optional
+from fastapi import APIRouter, Query, WebSocket
+from sqlalchemy import select
+import orjson
+from app.redis_client import redis_client
 from app.config import settings
+from app.services.typing_indicator import TypingAggregator
+from app.services.message_persistence import MessageRejected, MessageWriter, WriterOverloaded
+from app.services.membership_cache import MembershipCache
+from app.services.room_events import RoomEventBuffer, resumed_frame
+from app.services.presence_service import PresenceService
+from app.services.message_queue import Events
+from app.caching.room_message_cache import room_message_cache
+from app.database import AsyncSessionLocal
+from app.models.room_member import RoomMember
+from app.services.auth import AuthService
+
+logger = logging.getLogger(__name__)
+
+# WebSocket endpoints, mounted by app.main
+router = APIRouter()
+
+# Close code sent to sockets that cannot keep up with their outbound queue
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+def encode_message(message: dict) -> bytes:
+    """Serialize a frame once; the same bytes go to Redis and every local socket"""
+    return orjson.dumps(message)
+
+class OutboundQueue:
+    """
+    Bounded per-socket send buffer drained by its own writer task
+    Lets broadcasts enqueue without waiting on any single client
+    """
+    
+    def __init__(self, websocket: WebSocket, maxsize: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+        self._writer_task = asyncio.create_task(self._writer())
+    
+    def put(self, payload) -> bool:
+        """Enqueue a frame without blocking; evicts the socket on overflow"""
+        if self.closed:
+            return False
+        
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Outbound queue full, evicting slow consumer")
+            self.closed = True
+            self._writer_task.cancel()
+            asyncio.create_task(self._close(SLOW_CONSUMER_CLOSE_CODE, "Slow consumer"))
+            return False
+    
+    async def stop(self):
+        """Stop the writer task; pending frames are discarded"""
+        self.closed = True
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+    
+    async def _writer(self):
+        while True:
+            payload = await self.queue.get()
+            try:
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+            except Exception as e:
+                logger.error(f"Failed to send message: {e}")
+                self.closed = True
+                return
+    
+    async def _close(self, code: int, reason: str):
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception as e:
+            logger.debug(f"Close after eviction failed: {e}")
 
 class ConnectionManager:
     """Manages active WebSocket connections"""
@@ -21,141 +101,562 @@ class ConnectionManager:
         # User ID -> Set of WebSocket connections (for direct messages)
         self.user_connections: Dict[str, Set[WebSocket]] = {}
         
+        # WebSocket -> outbound queue (shared by its room and user entries)
+        self.outboxes: Dict[WebSocket, OutboundQueue] = {}
+        
+        # WebSocket -> Room IDs (several per socket on the multiplexed endpoint)
+        self.socket_rooms: Dict[WebSocket, Set[str]] = {}
+        
         # Redis for pub/sub across multiple instances
         self.redis = None
+        
+        # One shared pub/sub connection per worker, read by a single task
+        self.pubsub = None
+        self._listener_task: Optional[asyncio.Task] = None
+        
+        # Channel -> number of local sockets interested in it
+        self._channel_refs: Dict[str, int] = {}
+        
+        # Prefixed to every publish so the listener can skip our own echoes
+        # (local sockets are already served directly by broadcast_to_room)
+        self.instance_id = uuid.uuid4().hex.encode()
     
     async def init_redis(self):
         """Initialize Redis pub/sub"""
-        self.redis = await redis.from_url(settings.REDIS_URL)
+        self.redis = redis_client()
+        self.pubsub = self.redis.pubsub()
+        self._listener_task = asyncio.create_task(self._listen())
+    
+    async def close(self):
+        """Stop the pub/sub listener and release the Redis connection"""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        
+        if self.pubsub:
+            await self.pubsub.close()
+            self.pubsub = None
+        
+        self._channel_refs.clear()
+        
+        if self.redis:
+            await self.redis.close()
     
     async def connect(self, websocket: WebSocket, room_id: str, user_id: str):
         """Register new WebSocket connection"""
+        await self.accept(websocket, user_id)
+        await self.join_room(websocket, room_id)
+    
+    async def disconnect(self, websocket: WebSocket, room_id: str, user_id: str):
+        """Unregister WebSocket connection"""
+        await self.release(websocket, user_id)
+    
+    async def accept(self, websocket: WebSocket, user_id: str):
+        """Accept a socket and register it for user-level delivery"""
         await websocket.accept()
         
-        # Add to room connections
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = set()
-        self.active_connections[room_id].add(websocket)
+        if websocket not in self.outboxes:
+            self.outboxes[websocket] = OutboundQueue(
+                websocket, settings.ws_outbound_queue_size
+            )
+        self.socket_rooms.setdefault(websocket, set())
         
         # Add to user connections
         if user_id not in self.user_connections:
             self.user_connections[user_id] = set()
         self.user_connections[user_id].add(websocket)
         
+        # Subscribe to user-specific events
+        await self._acquire_channel(f"user:{user_id}")
+    
+    async def join_room(self, websocket: WebSocket, room_id: str):
+        """Add an accepted socket to a room's fan-out"""
+        
+        if room_id in self.socket_rooms.get(websocket, ()):
+            return
+        self.socket_rooms.setdefault(websocket, set()).add(room_id)
+        
+        # Add to room connections
+        if room_id not in self.active_connections:
+            self.active_connections[room_id] = set()
+        self.active_connections[room_id].add(websocket)
+        
         # Subscribe to room events
-        await self.redis.subscribe(f"room:{room_id}")
+        await self._acquire_channel(f"room:{room_id}")
+    
+    async def leave_room(self, websocket: WebSocket, room_id: str):
+        """Remove a socket from a room's fan-out"""
         
-        # Subscribe to user-specific events
-        await self.redis.subscribe(f"user:{user_id}")
+        if room_id not in self.socket_rooms.get(websocket, ()):
+            return
+        self.socket_rooms[websocket].discard(room_id)
+        
+        self.active_connections[room_id].discard(websocket)
+        if not self.active_connections[room_id]:
+            del self.active_connections[room_id]
+        await self._release_channel(f"room:{room_id}")
     
-    async def disconnect(self, websocket: WebSocket, room_id: str, user_id: str):
-        """Unregister WebSocket connection"""
+    async def release(self, websocket: WebSocket, user_id: str):
+        """Drop a socket from every room and from user-level delivery"""
         
-        if room_id in self.active_connections:
-            self.active_connections[room_id].discard(websocket)
+        for room_id in list(self.socket_rooms.get(websocket, ())):
+            await self.leave_room(websocket, room_id)
+        self.socket_rooms.pop(websocket, None)
         
-        if user_id in self.user_connections:
+        if websocket in self.user_connections.get(user_id, ()):
             self.user_connections[user_id].discard(websocket)
+            if not self.user_connections[user_id]:
+                del self.user_connections[user_id]
+            await self._release_channel(f"user:{user_id}")
+        
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox:
+            await outbox.stop()
     
-    async def broadcast_to_room(self, room_id: str, message: dict):
-        """Broadcast message to all users in room"""
+    def rooms_for(self, websocket: WebSocket) -> Set[str]:
+        """Rooms a socket is currently subscribed to"""
+        return self.socket_rooms.get(websocket, set())
+    
+    def rooms_for_user(self, user_id: str) -> Set[str]:
+        """Rooms followed by any local socket of the user"""
+        rooms = set()
+        for websocket in self.user_connections.get(user_id, ()):
+            rooms |= self.rooms_for(websocket)
+        return rooms
+    
+    def send_to_socket(self, websocket: WebSocket, message):
+        """Queue a frame (dict or pre-encoded text) for one socket, in order with broadcasts"""
+        if not isinstance(message, str):
+            message = encode_message(message).decode()
+        self._enqueue((websocket,), message)
+    
+    def _enqueue(self, connections, payload):
+        """Hand a frame to each socket's outbound queue without awaiting sends"""
+        for connection in list(connections):
+            outbox = self.outboxes.get(connection)
+            if outbox:
+                outbox.put(payload)
+    
+    async def _acquire_channel(self, channel: str):
+        """Subscribe the shared pub/sub when the first local socket needs a channel"""
+        
+        self._channel_refs[channel] = self._channel_refs.get(channel, 0) + 1
+        if self._channel_refs[channel] == 1 and self.pubsub:
+            await self.pubsub.subscribe(channel)
+    
+    async def _release_channel(self, channel: str):
+        """Unsubscribe once the last local socket for a channel has gone"""
+        
+        refs = self._channel_refs.get(channel, 0) - 1
+        if refs > 0:
+            self._channel_refs[channel] = refs
+            return
+        
+        self._channel_refs.pop(channel, None)
+        if self.pubsub:
+            await self.pubsub.unsubscribe(channel)
+    
+    async def _listen(self):
+        """
+        Single reader for the worker's pub/sub connection
+        Routes messages published by other instances to local sockets
+        """
+        
+        while True:
+            try:
+                if not self.pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0
+                )
+                if message is None or message['type'] != 'message':
+                    continue
+                
+                await self._route(message['channel'], message['data'])
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pub/sub listener error: {e}")
+                await asyncio.sleep(1)
+    
+    async def _route(self, channel, data):
+        """Deliver a message received from Redis to the local sockets it targets"""
+        
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        
+        origin, payload = data[:32], data[32:]
+        if origin == self.instance_id:
+            return
+        
+        kind, _, target = channel.partition(":")
+        if kind == "room":
+            connections = self.active_connections.get(target, ())
+        elif kind == "user":
+            connections = self.user_connections.get(target, ())
+        else:
+            return
+        
+        # Decode once for the whole fan-out; sockets receive text frames
+        self._enqueue(connections, payload.decode())
+    
+    async def publish_encoded(self, channel: str, connections, payload: bytes):
+        """
+        Fan out an already-encoded frame
+        Redis gets the bytes tagged with this instance's ID, local sockets
+        get one shared decoded copy, so nothing is re-serialized per socket
+        """
         
         # Publish via Redis (reaches all server instances)
-        await self.redis.publish(f"room:{room_id}", json.dumps(message))
+        await self.redis.publish(channel, self.instance_id + payload)
         
         # Also send to local connections for low latency
-        if room_id in self.active_connections:
-            for connection in self.active_connections[room_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Failed to send message: {e}")
+        if connections:
+            self._enqueue(connections, payload.decode())
     
-    async def send_to_user(self, user_id: str, message: dict):
-        """Send message to specific user"""
+    async def publish_many(self, frames):
+        """
+        publish_encoded() for several (channel, connections, payload) at
+        once, with all the Redis publishes in one pipelined round trip
+        """
         
-        await self.redis.publish(f"user:{user_id}", json.dumps(message))
+        pipe = self.redis.pipeline(transaction=False)
+        for channel, _, payload in frames:
+            pipe.publish(channel, self.instance_id + payload)
+        await pipe.execute()
         
-        if user_id in self.user_connections:
-            for connection in self.user_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Failed to send to user: {e}")
+        for _, connections, payload in frames:
+            if connections:
+                self._enqueue(connections, payload.decode())
+    
+    async def broadcast_to_room(self, room_id: str, message: dict):
+        """Broadcast message to all users in room"""
+        await self.publish_encoded(
+            f"room:{room_id}",
+            self.active_connections.get(room_id, ()),
+            encode_message(message)
+        )
+    
+    async def send_to_user(self, user_id: str, message: dict):
+        """Send message to specific user"""
+        await self.publish_encoded(
+            f"user:{user_id}",
+            self.user_connections.get(user_id, ()),
+            encode_message(message)
+        )
 
 # Create global instance
 ws_manager = ConnectionManager()
 
+async def ack_persisted(records: list):
+    """
+    Tell senders which of their messages are now durably stored
+    One 'acks' frame per sender per batch, all published in one round trip
+    """
+    
+    acks: Dict[str, list] = {}
+    for record in records:
+        acks.setdefault(record['sender_id'], []).append({
+            'message_id': record['id'],
+            'client_id': record.get('client_id'),
+            'room_id': record['room_id'],
+            'seq': record['seq']
+        })
+    
+    await ws_manager.publish_many([
+        (
+            f"user:{user_id}",
+            ws_manager.user_connections.get(user_id, ()),
+            encode_message({'type': 'acks', 'acks': user_acks})
+        )
+        for user_id, user_acks in acks.items()
+    ])
+
+# Messages are broadcast first and written to Postgres in batches
+message_writer = MessageWriter(
+    batch_size=settings.message_batch_size,
+    flush_interval=settings.message_flush_ms / 1000,
+    on_persisted=ack_persisted,
+    recover_idle=settings.message_recover_idle_seconds,
+    recover_interval=settings.message_recover_interval_seconds,
+    max_pending=settings.message_max_pending
+)
+
+# Recent sequenced room frames for resume-after-reconnect
+room_events = RoomEventBuffer(
+    max_events=settings.room_event_buffer_size,
+    ttl=settings.room_event_buffer_ttl_seconds
+)
+
+# Heartbeat-driven presence with one diff per room per tick
+presence = PresenceService(
+    ws_manager.rooms_for_user,
+    ws_manager.broadcast_to_room,
+    interval=settings.presence_flush_seconds,
+    ttl=settings.presence_ttl_seconds
+)
+
+# Typing frames are coalesced per room instead of rebroadcast one by one
+typing_aggregator = TypingAggregator(
+    ws_manager.broadcast_to_room,
+    interval=settings.typing_window_ms / 1000,
+    ttl=settings.typing_ttl_seconds
+)
+
+async def load_membership(room_id: str, user_id: str) -> bool:
+    """Membership lookup on a session that is released straight away"""
+    async with AsyncSessionLocal() as db:
+        member = await db.execute(
+            select(RoomMember.user_id).where(
+                (RoomMember.room_id == room_id) &
+                (RoomMember.user_id == user_id)
+            )
+        )
+        return member.scalar() is not None
+
+# Connect-time authorization, invalidated across workers on join/leave
+membership_cache = MembershipCache(
+    load_membership,
+    max_entries=settings.membership_cache_size,
+    ttl=settings.membership_cache_ttl_seconds
+)
+
+async def handle_membership_event(event: dict):
+    """
+    Join/leave events from the rooms API ('rooms' channel)
+    One worker handles each event; invalidate() then reaches every worker
+    """
+    if event['type'] in (Events.ROOM_MEMBER_JOINED, Events.ROOM_MEMBER_LEFT):
+        await membership_cache.invalidate(event['room_id'], str(event['user_id']))
+
+async def handle_room_frame(websocket: WebSocket, user_id: str, room_id: str, data: dict):
+    """Handle a client frame addressed to one room (shared by both endpoints)"""
+    
+    if data['type'] == 'message':
+        # Journal and queue for batched insert; an 'acks' frame
+        # naming it follows once the row is committed
+        try:
+            message = await message_writer.submit(
+                room_id,
+                user_id,
+                data['content'],
+                is_encrypted=data.get('is_encrypted', False),
+                client_id=data.get('client_id')
+            )
+        except (MessageRejected, WriterOverloaded) as e:
+            # Refused before journaling; the client may fix or retry it
+            ws_manager.send_to_socket(websocket, {
+                'type': 'error', 'room_id': room_id, 'client_id': data.get('client_id'),
+                'code': 4022 if isinstance(e, MessageRejected) else 4013,
+                'reason': str(e)
+            })
+            return
+        
+        # Buffer for resuming clients before broadcasting the same bytes, so a
+        # resume racing this message either replays it or is already live
+        message_frame = {
+            'type': 'message',
+            'room_id': room_id,
+            'seq': message['seq'],
+            'message_id': message['id'],
+            'client_id': message['client_id'],
+            'sender_id': user_id,
+            'content': data['content'],
+            'timestamp': message['created_at']
+        }
+        frame = encode_message(message_frame)
+        await room_events.append(room_id, message['seq'], frame)
+        
+        # Broadcast and first-page cache are independent round trips
+        await asyncio.gather(
+            ws_manager.publish_encoded(
+                f"room:{room_id}", ws_manager.active_connections.get(room_id, ()), frame
+            ),
+            room_message_cache.append(room_id, {
+                'id': message['id'],
+                'room_id': room_id,
+                'seq': message['seq'],
+                'sender_id': user_id,
+                'content': message['content'],
+                'media_urls': [],
+                'is_encrypted': message['is_encrypted'],
+                'reactions': {},
+                'created_at': message['created_at'],
+                'updated_at': message['created_at'],
+            })
+        )
+        typing_aggregator.update(room_id, user_id, False)
+    
+    elif data['type'] == 'typing':
+        # Coalesced and flushed by the aggregator's ticker
+        typing_aggregator.update(room_id, user_id, data['is_typing'])
+    
+    elif data['type'] == 'reaction':
+        # Add emoji reaction
+        # ... implementation
+        pass
+
+async def resume_room(websocket: WebSocket, room_id: str, last_seq: int):
+    """
+    Replay the room frames a reconnecting client missed
+    Sends one 'resumed' frame, or 'resync' if the buffer no longer covers
+    last_seq and the client must fall back to the history API. Call after
+    join_room so nothing published in between is lost; clients drop any
+    seq they have already applied.
+    """
+    
+    events = await room_events.since(room_id, last_seq)
+    if events is None:
+        ws_manager.send_to_socket(websocket, {
+            'type': 'resync', 'room_id': room_id, 'last_seq': last_seq
+        })
+    else:
+        ws_manager.send_to_socket(websocket, resumed_frame(room_id, events))
+
+async def send_presence_snapshot(websocket: WebSocket, room_id: str):
+    """Current online users for a new watcher; 'presence' diffs follow"""
+    ws_manager.send_to_socket(websocket, {
+        'type': 'presence_snapshot',
+        'room_id': room_id,
+        'online': await presence.online_users(room_id)
+    })
+
+async def release_socket(websocket: WebSocket, user_id: str):
+    """Tear down a socket and report the presence changes it causes"""
+    
+    rooms = set(ws_manager.rooms_for(websocket))
+    for room_id in rooms:
+        typing_aggregator.update(room_id, user_id, False)
+    
+    await ws_manager.release(websocket, user_id)
+    
+    if user_id not in ws_manager.user_connections:
+        presence.disconnected(user_id, rooms)
+    else:
+        for room_id in rooms:
+            presence.left(room_id, user_id)
+
 # WebSocket endpoint
-@app.websocket("/ws/{room_id}")
+@router.websocket("/ws/{room_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     room_id: str,
-    token: str = Query(...)
+    token: str = Query(...),
+    last_seq: Optional[int] = Query(None)
 ):
     """WebSocket endpoint for real-time messaging"""
     
     # Verify token
-    user_id = verify_token(token)
+    user_id = AuthService.verify_token(token)
     if not user_id:
         await websocket.close(code=4001, reason="Unauthorized")
         return
     
-    # Verify user is member of room
-    db = SessionLocal()
-    member = await db.execute(
-        select(RoomMember).where(
-            (RoomMember.room_id == room_id) &
-            (RoomMember.user_id == user_id)
-        )
-    )
-    if not member.scalar():
+    # Verify user is member of room (no DB session is held by the socket)
+    if not await membership_cache.is_member(room_id, user_id):
         await websocket.close(code=4003, reason="Not a member")
         return
     
     # Connect
     await ws_manager.connect(websocket, room_id, user_id)
+    presence.heartbeat(user_id)
+    presence.joined(room_id, user_id)
+    await send_presence_snapshot(websocket, room_id)
+    
+    # Resume: replay only what was missed since the client's last seq
+    if last_seq is not None:
+        await resume_room(websocket, room_id, last_seq)
     
     try:
         while True:
             # Receive message from client
             data = await websocket.receive_json()
             
-            if data['type'] == 'message':
-                # Save to database
-                message = Message(
-                    room_id=room_id,
-                    sender_id=user_id,
-                    content=data['content'],
-                    is_encrypted=data.get('is_encrypted', False)
-                )
-                db.add(message)
-                await db.commit()
-                
-                # Broadcast to room
-                await ws_manager.broadcast_to_room(room_id, {
-                    'type': 'message',
-                    'message_id': str(message.id),
-                    'sender_id': user_id,
-                    'content': data['content'],
-                    'timestamp': message.created_at.isoformat()
-                })
+            if data['type'] == 'heartbeat':
+                presence.heartbeat(user_id, data.get('state', 'online'))
+            else:
+                await handle_room_frame(websocket, user_id, room_id, data)
+    
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+    finally:
+        await release_socket(websocket, user_id)
+
+# Multiplexed WebSocket endpoint
+@router.websocket("/ws")
+async def multiplexed_websocket_endpoint(
+    websocket: WebSocket,
+    token: str = Query(...)
+):
+    """
+    One socket per device for any number of rooms
+    Control frames: {'type': 'subscribe' | 'unsubscribe', 'room_id': ...}
+    (subscribe may include 'last_seq' to resume) and
+    {'type': 'heartbeat', 'state': 'online' | 'away'}
+    Every other frame must carry 'room_id'; outgoing room frames carry it too
+    """
+    
+    # Verify token
+    user_id = AuthService.verify_token(token)
+    if not user_id:
+        await websocket.close(code=4001, reason="Unauthorized")
+        return
+    
+    await ws_manager.accept(websocket, user_id)
+    presence.heartbeat(user_id)
+    
+    try:
+        while True:
+            data = await websocket.receive_json()
+            room_id = data.get('room_id')
             
-            elif data['type'] == 'typing':
-                # Broadcast typing indicator
-                await ws_manager.broadcast_to_room(room_id, {
-                    'type': 'typing',
-                    'user_id': user_id,
-                    'is_typing': data['is_typing']
-                })
+            if data['type'] == 'heartbeat':
+                presence.heartbeat(user_id, data.get('state', 'online'))
             
-            elif data['type'] == 'reaction':
-                # Add emoji reaction
-                # ... implementation
-                pass
+            elif data['type'] == 'subscribe':
+                if len(ws_manager.rooms_for(websocket)) >= settings.ws_max_rooms_per_socket:
+                    ws_manager.send_to_socket(websocket, {
+                        'type': 'error', 'room_id': room_id, 'code': 4029,
+                        'reason': "Too many rooms"
+                    })
+                elif not await membership_cache.is_member(room_id, user_id):
+                    ws_manager.send_to_socket(websocket, {
+                        'type': 'error', 'room_id': room_id, 'code': 4003,
+                        'reason': "Not a member"
+                    })
+                else:
+                    await ws_manager.join_room(websocket, room_id)
+                    presence.joined(room_id, user_id)
+                    ws_manager.send_to_socket(websocket, {'type': 'subscribed', 'room_id': room_id})
+                    await send_presence_snapshot(websocket, room_id)
+                    if data.get('last_seq') is not None:
+                        await resume_room(websocket, room_id, int(data['last_seq']))
+            
+            elif data['type'] == 'unsubscribe':
+                if room_id in ws_manager.rooms_for(websocket):
+                    typing_aggregator.update(room_id, user_id, False)
+                    await ws_manager.leave_room(websocket, room_id)
+                    presence.left(room_id, user_id)
+                ws_manager.send_to_socket(websocket, {'type': 'unsubscribed', 'room_id': room_id})
+            
+            elif room_id in ws_manager.rooms_for(websocket):
+                await handle_room_frame(websocket, user_id, room_id, data)
+            
+            else:
+                ws_manager.send_to_socket(websocket, {
+                    'type': 'error', 'room_id': room_id, 'code': 4004,
+                    'reason': "Not subscribed"
+                })
     
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        await ws_manager.disconnect(websocket, room_id, user_id)
-        await db.close()
+        await release_socket(websocket, user_id)
@@ -0,0 +1,28 @@
+# /backend/app/utils/pagination.py
+"""
+Opaque keyset cursors
+A cursor encodes the sort key of a boundary row, so the next page is an
+index range scan instead of an OFFSET that re-reads every skipped row
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+import orjson
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Encode a (created_at, id) sort key as a URL-safe token"""
+    raw = orjson.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a token from encode_cursor back into (created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = orjson.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise InvalidCursor(cursor)
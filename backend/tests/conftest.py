@@ -12,10 +12,8 @@ async def test_db():
     engine = create_async_engine("sqlite+aiosqlite:///:memory:")
     
     async with engine.begin() as conn:
-        from app.models.user import Base as UserBase
-        from app.models.message import Base as MessageBase
-        await conn.run_sync(UserBase.metadata.create_all)
-        await conn.run_sync(MessageBase.metadata.create_all)
+        from app.models import Base
+        await conn.run_sync(Base.metadata.create_all)
     
     async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     
@@ -0,0 +1,77 @@
+"""Cache wrapper batching tests (fakeredis)"""
+
+import asyncio
+import pytest
+import fakeredis
+from redis.exceptions import ResponseError
+from app.cache import Cache
+
+def connected(auto_batch: bool = False) -> Cache:
+    cache = Cache(auto_batch=auto_batch)
+    cache.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return cache
+
+def count_pipelines(cache: Cache) -> list:
+    opened = []
+    pipeline = cache.redis.pipeline
+
+    def counting(*args, **kwargs):
+        opened.append(kwargs)
+        return pipeline(*args, **kwargs)
+
+    cache.redis.pipeline = counting
+    return opened
+
+@pytest.mark.asyncio
+async def test_mset_then_mget_round_trips():
+    cache = connected()
+    opened = count_pipelines(cache)
+
+    await cache.mset({"a": 1, "b": {"n": 2}}, ex=60)
+
+    assert len(opened) == 1
+    assert await cache.mget(["a", "missing", "b"]) == ["1", None, '{"n": 2}']
+    assert 0 < await cache.redis.ttl("a") <= 60
+
+@pytest.mark.asyncio
+async def test_mget_without_redis_returns_misses():
+    assert await Cache().mget(["a", "b"]) == [None, None]
+
+@pytest.mark.asyncio
+async def test_pipeline_collects_results():
+    cache = connected()
+
+    async with cache.pipeline() as pipe:
+        pipe.set("a", [1, 2])
+        pipe.get("a")
+
+    assert pipe.results == [True, "[1, 2]"]
+
+@pytest.mark.asyncio
+async def test_same_tick_calls_share_one_pipeline():
+    cache = connected(auto_batch=True)
+    await cache.redis.set("a", "1")
+    opened = count_pipelines(cache)
+
+    results = await asyncio.gather(
+        cache.get("a"),
+        cache.set("b", 2),
+        cache.exists("a"),
+        cache.get("missing"),
+    )
+
+    assert len(opened) == 1
+    assert results == ["1", None, True, None]
+    assert await cache.redis.get("b") == "2"
+
+@pytest.mark.asyncio
+async def test_batched_error_only_fails_its_caller():
+    cache = connected(auto_batch=True)
+    await cache.redis.lpush("list", "x")
+
+    good, bad = await asyncio.gather(
+        cache.exists("list"), cache.get("list"), return_exceptions=True
+    )
+
+    assert good is True
+    assert isinstance(bad, ResponseError)
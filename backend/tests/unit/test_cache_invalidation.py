@@ -0,0 +1,92 @@
+"""Cross-instance L1 invalidation tests (two CacheManagers on one fakeredis server)"""
+
+import asyncio
+import pytest
+import fakeredis
+from app.caching import cache_manager as cache_module
+from app.caching.cache_manager import CacheManager, MISSING
+
+@pytest.fixture
+async def managers(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        cache_module, "redis_client", lambda: fakeredis.aioredis.FakeRedis(server=server)
+    )
+
+    managers = [CacheManager(), CacheManager()]
+    for manager in managers:
+        await manager.initialize()
+    yield managers
+    for manager in managers:
+        await manager.close()
+
+async def settle():
+    """Let each listener pick up the broadcast"""
+    await asyncio.sleep(0.05)
+
+@pytest.mark.asyncio
+async def test_delete_evicts_other_workers_l1(managers):
+    first, second = managers
+    await first.set("user:1", b"old")
+    await settle()
+    assert await second.get("user:1") == b"old"  # Now held in second's L1
+
+    await first.delete("user:1")
+    await settle()
+
+    assert second.l1_cache.get("user:1") is MISSING
+    assert await second.get("user:1") is None
+
+@pytest.mark.asyncio
+async def test_write_evicts_stale_copies_elsewhere(managers):
+    first, second = managers
+    await first.set("user:1", b"v1")
+    await settle()
+    await second.get("user:1")
+
+    await first.set("user:1", b"v2")
+    await settle()
+
+    assert await second.get("user:1") == b"v2"
+
+@pytest.mark.asyncio
+async def test_pattern_invalidation_is_broadcast(managers):
+    first, second = managers
+    await first.set("room:1:messages", b"a")
+    await first.set("room:2:messages", b"b")
+    await settle()
+    await second.get("room:1:messages")
+    await second.get("room:2:messages")
+
+    await first.invalidate("room:1:*")
+    await settle()
+
+    assert second.l1_cache.get("room:1:messages") is MISSING
+    assert second.l1_cache.get("room:2:messages") == b"b"
+
+@pytest.mark.asyncio
+async def test_own_broadcasts_are_ignored(managers):
+    """A worker's own write is not evicted by its echo"""
+    first, _ = managers
+    await first.set("user:1", b"v1")
+    await settle()
+
+    assert first.l1_cache.get("user:1") == b"v1"
+
+@pytest.mark.asyncio
+async def test_read_racing_an_eviction_is_not_cached(managers):
+    """A value read from Redis while an eviction lands does not enter L1"""
+    first, second = managers
+    await first.set("user:1", b"old", level="l2")
+
+    original_get = second.redis.get
+
+    async def slow_get(key):
+        value = await original_get(key)
+        second._evict(key=key)  # Invalidation arrives mid-read
+        return value
+
+    second.redis.get = slow_get
+    await second.get("user:1")
+
+    assert second.l1_cache.get("user:1") is MISSING
@@ -0,0 +1,33 @@
+"""Cache key and serializer tests"""
+
+import uuid
+import pytest
+from app.caching.keys import KeyBuilder
+from app.caching.serialization import get_serializer
+
+async def get_room(room_id: uuid.UUID, limit: int = 50, client=None):
+    pass
+
+def test_keys_are_stable_across_call_styles():
+    """Positional, keyword and defaulted calls map to one key"""
+    build_key = KeyBuilder(get_room, prefix="room", key_args=["room_id", "limit"])
+    room_id = uuid.uuid4()
+
+    assert build_key(room_id) == build_key(room_id=room_id, limit=50)
+    assert build_key(room_id, client=object()) == build_key(room_id)
+    assert build_key(room_id) != build_key(room_id, limit=10)
+    assert build_key(room_id).startswith("room:")
+
+def test_unkeyable_arguments_are_rejected():
+    build_key = KeyBuilder(get_room)
+
+    with pytest.raises(TypeError):
+        build_key(uuid.uuid4(), client=object())
+
+def test_compressed_round_trip():
+    serializer = get_serializer("orjson", compress_threshold=64)
+    small, large = {"a": 1}, {"text": "x" * 1000}
+
+    assert serializer.loads(serializer.dumps(small)) == small
+    assert serializer.loads(serializer.dumps(large)) == large
+    assert len(serializer.dumps(large)) < 100
@@ -0,0 +1,74 @@
+"""CacheManager read-through tests (L1 only, no Redis)"""
+
+import asyncio
+import time
+import pytest
+from app.caching.cache_manager import CacheManager
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once():
+    """Single-flight: one loader call serves every waiting caller"""
+    manager = CacheManager()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"name": "alice"}
+
+    results = await asyncio.gather(*[
+        manager.get_or_load("user:1", loader, ttl=60) for _ in range(20)
+    ])
+
+    assert calls == 1
+    assert all(result == {"name": "alice"} for result in results)
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing():
+    """Within stale_ttl the old value is returned and reloaded in the background"""
+    manager = CacheManager()
+    versions = iter([1, 2])
+
+    async def loader():
+        return next(versions)
+
+    assert await manager.get_or_load("room:1", loader, ttl=60, stale_ttl=30) == 1
+
+    # Expire the entry's soft TTL
+    value, delta, _ = manager.l1_cache.get("room:1")
+    manager.l1_cache.set("room:1", (value, delta, time.time() - 1), ttl=60)
+
+    assert await manager.get_or_load("room:1", loader, ttl=60, stale_ttl=30) == 1
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await manager.get_or_load("room:1", loader, ttl=60, stale_ttl=30) == 2
+
+@pytest.mark.asyncio
+async def test_loaded_entry_is_sized_by_payload():
+    """L1 accounts the serialized envelope, not the tuple holding it"""
+    manager = CacheManager()
+    rows = [{"id": i, "body": "x" * 100} for i in range(50)]
+
+    async def loader():
+        return rows
+
+    await manager.get_or_load("room:1", loader, ttl=60)
+
+    payload = manager.serializer.dumps({'v': rows, 'd': 0.0, 'e': time.time()})
+    assert manager.l1_cache.bytes >= len(payload) - 32
+
+@pytest.mark.asyncio
+async def test_load_invalidated_midway_is_not_cached():
+    """A delete racing the loader must not be undone by the stale result"""
+    manager = CacheManager()
+    versions = iter([1, 2])
+
+    async def loader():
+        value = next(versions)
+        if value == 1:
+            await manager.delete("user:1")  # The write behind it lands now
+        return value
+
+    assert await manager.get_or_load("user:1", loader, ttl=60) == 1
+    assert await manager.get_or_load("user:1", loader, ttl=60) == 2
@@ -0,0 +1,87 @@
+"""Tag invalidation tests for both tag modes (fakeredis)"""
+
+import asyncio
+import pytest
+import fakeredis
+from app.caching import cache_manager as cache_module
+from app.caching.cache_manager import CacheManager
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    """Every CacheManager created in the test talks to one fakeredis server"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        cache_module, "redis_client", lambda: fakeredis.aioredis.FakeRedis(server=server)
+    )
+
+@pytest.fixture(params=["sets", "generation"])
+async def managers(request, shared_redis):
+    managers = [CacheManager(tag_mode=request.param), CacheManager(tag_mode=request.param)]
+    for manager in managers:
+        await manager.initialize()
+    yield managers
+    for manager in managers:
+        await manager.close()
+
+async def settle():
+    await asyncio.sleep(0.05)
+
+@pytest.mark.asyncio
+async def test_invalidate_tags_drops_tagged_entries_everywhere(managers):
+    first, second = managers
+    await first.set("room:1:info", b"info", tags=["room:1"])
+    await first.set("room:1:pins", b"pins", tags=["room:1", "user:9"])
+    await first.set("room:2:info", b"other", tags=["room:2"])
+    await settle()
+    for key, tags in (("room:1:info", ["room:1"]), ("room:1:pins", ["room:1", "user:9"])):
+        assert await second.get(key, tags=tags) is not None  # Held in second's L1
+
+    await first.invalidate_tags("room:1")
+    await settle()
+
+    for manager in managers:
+        assert await manager.get("room:1:info", tags=["room:1"]) is None
+        assert await manager.get("room:1:pins", tags=["room:1", "user:9"]) is None
+        assert await manager.get("room:2:info", tags=["room:2"]) == b"other"
+
+@pytest.mark.asyncio
+async def test_read_through_entries_are_tag_invalidated(managers):
+    first, second = managers
+    versions = iter([1, 2])
+
+    async def loader():
+        return next(versions)
+
+    assert await first.get_or_load("room:1:count", loader, tags=["room:1"]) == 1
+    await first.invalidate_tags("room:1")
+    await settle()
+
+    assert await second.get_or_load("room:1:count", loader, tags=["room:1"]) == 2
+
+@pytest.mark.asyncio
+async def test_sets_mode_unlinks_members_in_chunks(shared_redis, monkeypatch):
+    monkeypatch.setattr(cache_module, "INVALIDATION_CHUNK", 3)
+    manager = CacheManager(tag_mode="sets")
+    await manager.initialize()
+
+    for i in range(7):
+        await manager.set(f"msg:{i}", b"x", tags=["room:1"])
+    await manager.invalidate_tags("room:1")
+
+    assert await manager.redis.exists("tag:room:1") == 0
+    assert await manager.redis.exists(*[f"msg:{i}" for i in range(7)]) == 0
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_generation_mode_invalidates_with_one_incr(shared_redis):
+    """Old entries are orphaned under the previous generation, not deleted"""
+    manager = CacheManager(tag_mode="generation")
+    await manager.initialize()
+
+    await manager.set("room:1:info", b"info", tags=["room:1"])
+    await manager.invalidate_tags("room:1")
+
+    assert await manager.redis.get("tag:room:1:gen") == b"1"
+    assert await manager.redis.get("room:1:info:g0") == b"info"
+    assert await manager.get("room:1:info", tags=["room:1"]) is None
+    await manager.close()
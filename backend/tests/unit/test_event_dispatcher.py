@@ -0,0 +1,74 @@
+"""EventDispatcher ordering and backpressure tests"""
+
+import asyncio
+import random
+import pytest
+from app.services.event_dispatcher import EventDispatcher
+
+@pytest.mark.asyncio
+async def test_partitioned_events_keep_per_key_order():
+    """Events sharing a partition key are handled in submission order"""
+    handled = {}
+
+    async def handler(event):
+        await asyncio.sleep(random.random() / 1000)
+        handled.setdefault(event['user_id'], []).append(event['n'])
+
+    dispatcher = EventDispatcher("test-order", handler, concurrency=4, partition_key='user_id')
+    dispatcher.start()
+    for n in range(50):
+        await dispatcher.submit({'user_id': f"u{n % 5}", 'n': n})
+    while dispatcher.depth:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert sorted(handled) == [f"u{i}" for i in range(5)]
+    for user_id, seen in handled.items():
+        assert seen == sorted(seen)
+        assert len(seen) == 10
+
+@pytest.mark.asyncio
+async def test_submit_blocks_when_queue_is_full():
+    """A full queue pauses the reader until a worker frees a slot"""
+    release = asyncio.Event()
+
+    async def handler(event):
+        await release.wait()
+
+    dispatcher = EventDispatcher("test-backpressure", handler, concurrency=1, max_queue=2)
+    dispatcher.start()
+
+    await dispatcher.submit({'n': 0})
+    await asyncio.sleep(0)  # Taken by the worker, which now waits on release
+    await dispatcher.submit({'n': 1})
+    await dispatcher.submit({'n': 2})
+
+    blocked = asyncio.create_task(dispatcher.submit({'n': 3}))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert dispatcher.depth == 2
+
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await dispatcher.stop()
+
+@pytest.mark.asyncio
+async def test_on_done_reports_handler_outcome():
+    """Failed handlers are reported so their stream entries stay pending"""
+    outcomes = []
+
+    async def handler(event):
+        if event['fail']:
+            raise ValueError("boom")
+
+    dispatcher = EventDispatcher(
+        "test-on-done", handler, concurrency=1, on_done=lambda token, ok: outcomes.append((token, ok))
+    )
+    dispatcher.start()
+    await dispatcher.submit({'fail': False}, token="a")
+    await dispatcher.submit({'fail': True}, token="b")
+    await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert outcomes == [("a", True), ("b", False)]
@@ -0,0 +1,60 @@
+"""Bounded L1 cache tests"""
+
+import time
+from app.caching.l1_cache import L1Cache, MISSING
+
+def test_lru_eviction_by_entries():
+    """The least recently used entry goes first"""
+    cache = L1Cache("test-entries", max_entries=2)
+
+    cache.set("a", b"1", ttl=60)
+    cache.set("b", b"2", ttl=60)
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3", ttl=60)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert cache.evictions == 1
+
+def test_eviction_by_bytes():
+    """Values are evicted once their total size passes max_bytes"""
+    cache = L1Cache("test-bytes", max_bytes=10)
+
+    cache.set("a", b"x" * 6, ttl=60)
+    cache.set("b", b"y" * 6, ttl=60)
+
+    assert len(cache) == 1
+    assert cache.bytes == 6
+    assert cache.get("b") == b"y" * 6
+
+def test_expired_entries_are_not_served():
+    """TTL is enforced on read and counted as a miss"""
+    cache = L1Cache("test-ttl")
+    cache.set("a", b"1", ttl=60)
+
+    value, _, size = cache.entries["a"]
+    cache.entries["a"] = (value, time.monotonic() - 1, size)
+
+    assert cache.get("a") is MISSING
+    assert len(cache) == 0
+    assert cache.stats()["misses"] == 1
+
+def test_pop_matching_uses_glob():
+    cache = L1Cache("test-glob")
+    cache.set("user:1:profile", b"1", ttl=60)
+    cache.set("user:2:profile", b"2", ttl=60)
+    cache.set("room:1", b"3", ttl=60)
+
+    assert cache.pop_matching("user:*") == 2
+    assert "room:1" in cache
+
+def test_explicit_size_overrides_estimate():
+    """Callers holding the serialized form charge its length, not getsizeof"""
+    cache = L1Cache("test-size", max_bytes=1000)
+
+    cache.set("a", ({"rows": list(range(500))}, 0.1, 0.0), ttl=60, size=900)
+    cache.set("b", ({}, 0.1, 0.0), ttl=60, size=200)
+
+    assert cache.get("a") is MISSING
+    assert cache.bytes == 200
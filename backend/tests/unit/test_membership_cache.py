@@ -0,0 +1,27 @@
+"""Membership cache invalidation tests"""
+
+import pytest
+from app.services import websocket_manager
+from app.services.membership_cache import MembershipCache
+from app.services.message_queue import Events
+
+@pytest.mark.asyncio
+async def test_member_left_event_evicts_cached_answer(monkeypatch):
+    """A leave published by the rooms API stops the cached 'member' answer being served"""
+    members = {("room-1", "alice")}
+
+    async def loader(room_id, user_id):
+        return (room_id, user_id) in members
+
+    cache = MembershipCache(loader, ttl=300)
+    monkeypatch.setattr(websocket_manager, "membership_cache", cache)
+
+    assert await cache.is_member("room-1", "alice")
+    members.clear()
+    assert await cache.is_member("room-1", "alice")  # Still cached
+
+    await websocket_manager.handle_membership_event({
+        'type': Events.ROOM_MEMBER_LEFT, 'room_id': "room-1", 'user_id': "alice"
+    })
+
+    assert not await cache.is_member("room-1", "alice")
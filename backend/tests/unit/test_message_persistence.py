@@ -0,0 +1,186 @@
+"""MessageWriter sequencing and journal recovery tests (fakeredis, no database)"""
+
+import asyncio
+import orjson
+import pytest
+import fakeredis
+from sqlalchemy.exc import DataError, OperationalError
+from app.services import message_persistence, websocket_manager
+from app.services.message_persistence import (
+    MessageWriter, MessageRejected, WriterOverloaded, JOURNAL_KEY, JOURNAL_GROUP, DEAD_LETTER_KEY
+)
+
+@pytest.fixture
+def make_writer(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        message_persistence, "redis_client", lambda: fakeredis.aioredis.FakeRedis(server=server)
+    )
+
+    async def make(**kwargs) -> MessageWriter:
+        writer = MessageWriter(**kwargs)
+        await writer.initialize()
+        return writer
+
+    return make
+
+@pytest.mark.asyncio
+async def test_missing_counter_is_seeded_from_postgres(make_writer, monkeypatch):
+    """An evicted counter continues after the highest stored seq instead of restarting at 1"""
+    writer = await make_writer()
+    loads = []
+
+    async def max_seq(room_id):
+        loads.append(room_id)
+        return 41
+
+    monkeypatch.setattr(writer, "_max_seq", max_seq)
+
+    first = await writer.submit("room-1", "alice", "hi")
+    second = await writer.submit("room-1", "alice", "again")
+
+    assert (first['seq'], second['seq']) == (42, 43)
+    assert loads == ["room-1"]  # Only while the counter is missing
+
+@pytest.mark.asyncio
+async def test_seed_covers_messages_not_yet_persisted(make_writer, monkeypatch):
+    """Buffered frames newer than Postgres win over MAX(seq)"""
+    writer = await make_writer()
+
+    async def max_seq(room_id):
+        return 5
+
+    monkeypatch.setattr(writer, "_max_seq", max_seq)
+    await writer.redis.zadd("room:room-1:events", {b"{}": 9})
+
+    message = await writer.submit("room-1", "alice", "hi")
+
+    assert message['seq'] == 10
+
+@pytest.mark.asyncio
+async def test_recover_only_takes_entries_idle_past_threshold(make_writer):
+    """A starting worker leaves a live writer's buffered entries alone"""
+    live = await make_writer(recover_idle=0.05)
+    starting = await make_writer(recover_idle=0.05)
+    await live.redis.set("room:room-1:seq", 0)
+    written = []
+
+    async def write(batch):
+        written.extend(record['seq'] for _, record in batch)
+        await starting.redis.xack(JOURNAL_KEY, JOURNAL_GROUP, *[entry_id for entry_id, _ in batch])
+
+    starting._write = write
+
+    await live.submit("room-1", "alice", "hi")
+    await starting.recover()
+    assert written == []
+
+    # The live writer died without committing its batch
+    await asyncio.sleep(0.1)
+    await starting.recover()
+    assert written == [1]
+
+@pytest.mark.asyncio
+async def test_submit_recreates_an_evicted_journal(make_writer):
+    """The writers group comes back with the stream instead of failing every send"""
+    writer = await make_writer()
+    await writer.redis.set("room:room-1:seq", 0)
+    await writer.redis.delete(JOURNAL_KEY)
+
+    message = await writer.submit("room-1", "alice", "hi")
+
+    assert message['seq'] == 1
+    assert len(writer.pending) == 1
+    pending = await writer.redis.xpending(JOURNAL_KEY, JOURNAL_GROUP)
+    assert pending['pending'] == 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content", ["nul\x00byte", "x" * 4097, None])
+async def test_unstorable_content_is_rejected_before_journaling(make_writer, content):
+    writer = await make_writer()
+
+    with pytest.raises(MessageRejected):
+        await writer.submit("room-1", "alice", content)
+
+    assert writer.pending == []
+    assert await writer.redis.xlen(JOURNAL_KEY) == 0
+
+@pytest.mark.asyncio
+async def test_submit_refuses_while_pending_is_full(make_writer):
+    writer = await make_writer(max_pending=2)
+    await writer.redis.set("room:room-1:seq", 0)
+    await writer.submit("room-1", "alice", "one")
+    await writer.submit("room-1", "alice", "two")
+
+    with pytest.raises(WriterOverloaded):
+        await writer.submit("room-1", "alice", "three")
+
+@pytest.mark.asyncio
+async def test_poison_rows_are_dead_lettered(make_writer):
+    """A row Postgres rejects is isolated; the rest of its batch is written in order"""
+    writer = await make_writer()
+    await writer.redis.set("room:room-1:seq", 0)
+    written = []
+
+    async def write(batch):
+        if any(record['content'] == "bad" for _, record in batch):
+            raise DataError("INSERT", {}, Exception("invalid byte sequence"))
+        written.extend(record['seq'] for _, record in batch)
+
+    writer._write = write
+    for content in ["a", "b", "bad", "c", "d"]:
+        await writer.submit("room-1", "alice", content)
+
+    await writer.flush()
+
+    assert written == [1, 2, 4, 5]
+    assert writer.pending == []
+    dead = await writer.redis.xrange(DEAD_LETTER_KEY)
+    assert [orjson.loads(fields[b'record'])['seq'] for _, fields in dead] == [3]
+    assert await writer.redis.xlen(JOURNAL_KEY) == 4  # The dead entry left the journal
+
+@pytest.mark.asyncio
+async def test_transient_failure_keeps_unwritten_rows(make_writer):
+    """Rows not yet written go back to pending, in order, for the next flush"""
+    writer = await make_writer()
+    await writer.redis.set("room:room-1:seq", 0)
+    calls = []
+
+    async def write(batch):
+        calls.append([record['seq'] for _, record in batch])
+        if len(calls) == 1:
+            raise DataError("INSERT", {}, Exception("duplicate key"))
+        if len(calls) == 3:
+            raise OperationalError("INSERT", {}, Exception("connection reset"))
+
+    writer._write = write
+    for content in ["a", "b", "c", "d"]:
+        await writer.submit("room-1", "alice", content)
+
+    with pytest.raises(OperationalError):
+        await writer.flush()
+
+    assert calls == [[1, 2, 3, 4], [1, 2], [3, 4]]
+    assert [record['seq'] for _, record in writer.pending] == [3, 4]
+    assert await writer.redis.xlen(DEAD_LETTER_KEY) == 0
+
+@pytest.mark.asyncio
+async def test_acks_are_grouped_per_sender(monkeypatch):
+    """One 'acks' frame per sender, published together"""
+    published = []
+
+    async def publish_many(frames):
+        published.append([(channel, orjson.loads(payload)) for channel, _, payload in frames])
+
+    monkeypatch.setattr(websocket_manager.ws_manager, "publish_many", publish_many)
+
+    await websocket_manager.ack_persisted([
+        {'id': 'm1', 'sender_id': 'alice', 'room_id': 'r', 'seq': 1, 'client_id': 'c1'},
+        {'id': 'm2', 'sender_id': 'bob', 'room_id': 'r', 'seq': 2, 'client_id': 'c2'},
+        {'id': 'm3', 'sender_id': 'alice', 'room_id': 'r', 'seq': 3, 'client_id': 'c3'},
+    ])
+
+    assert len(published) == 1
+    frames = dict(published[0])
+    assert [ack['seq'] for ack in frames['user:alice']['acks']] == [1, 3]
+    assert [ack['seq'] for ack in frames['user:bob']['acks']] == [2]
@@ -0,0 +1,116 @@
+"""MessageQueue streams backend tests (fakeredis)"""
+
+import json
+import asyncio
+import pytest
+import fakeredis
+from app.config import settings
+from app.services.event_dispatcher import EventDispatcher
+from app.services.message_queue import MessageQueue
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(settings, "event_block_ms", 10)
+    monkeypatch.setattr(settings, "event_reclaim_idle_ms", 10)
+    queue = MessageQueue()
+    queue.redis_client = fakeredis.aioredis.FakeRedis()
+    return queue
+
+async def pending_count(queue: MessageQueue, stream: str, group: str) -> int:
+    return (await queue.redis_client.xpending(stream, group))['pending']
+
+async def leave_pending(queue: MessageQueue, stream: str, group: str, event: dict) -> bytes:
+    """Deliver an entry to a consumer that never acks it"""
+    entry_id = await queue.redis_client.xadd(stream, {'data': json.dumps(event)})
+    await queue.redis_client.xreadgroup(group, "dead", {stream: ">"})
+    await asyncio.sleep(0.02)  # Past event_reclaim_idle_ms
+    return entry_id
+
+@pytest.mark.asyncio
+async def test_group_read_acks_after_handler(queue):
+    """Every event reaches the handler once and nothing is left pending"""
+    seen = []
+
+    async def handler(event):
+        seen.append(event['n'])
+
+    task = asyncio.create_task(queue.subscribe_to_channel("jobs", handler, group="g"))
+    await asyncio.sleep(0.05)
+    for n in range(5):
+        await queue.publish_event("jobs", {'type': 'job', 'n': n})
+    await asyncio.sleep(0.3)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert sorted(seen) == list(range(5))
+    assert await pending_count(queue, "events:jobs", "g") == 0
+
+@pytest.mark.asyncio
+async def test_group_is_recreated_after_stream_eviction(queue):
+    """A stream evicted with its group is consumed again instead of failing with NOGROUP"""
+    seen = []
+
+    async def handler(event):
+        seen.append(event['n'])
+
+    task = asyncio.create_task(queue.subscribe_to_channel("jobs", handler, group="g"))
+    await asyncio.sleep(0.05)
+    await queue.redis_client.delete("events:jobs")
+    await queue.publish_event("jobs", {'type': 'job', 'n': 1})
+    await asyncio.sleep(1.3)  # One error back-off
+    await queue.publish_event("jobs", {'type': 'job', 'n': 2})
+    await asyncio.sleep(0.2)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert sorted(seen) == [1, 2]
+
+@pytest.mark.asyncio
+async def test_reclaim_redispatches_idle_entries(queue):
+    """Entries a dead consumer left pending are claimed and handled here"""
+    stream = "events:jobs"
+    await queue._ensure_group(stream, "g")
+    entry_id = await leave_pending(queue, stream, "g", {'type': 'job', 'n': 1})
+
+    seen = []
+
+    async def handler(event):
+        seen.append(event['n'])
+
+    dispatcher = EventDispatcher("jobs", handler, concurrency=1)
+    dispatcher.start()
+    inflight = set()
+    await queue._reclaim(stream, "g", dispatcher, inflight)
+    await asyncio.sleep(0.01)
+    await dispatcher.stop()
+
+    assert seen == [1]
+    assert entry_id in inflight  # Acked by the read loop, not by _reclaim
+
+@pytest.mark.asyncio
+async def test_reclaim_skips_entries_inflight_here(queue):
+    """An entry this consumer is still handling is not claimed again"""
+    stream = "events:jobs"
+    await queue._ensure_group(stream, "g")
+    entry_id = await leave_pending(queue, stream, "g", {'type': 'job', 'n': 1})
+
+    dispatcher = EventDispatcher("jobs", lambda event: asyncio.sleep(0))
+    await queue._reclaim(stream, "g", dispatcher, {entry_id})
+
+    assert dispatcher.depth == 0
+
+@pytest.mark.asyncio
+async def test_dead_letter_after_max_deliveries(queue, monkeypatch):
+    """Entries delivered max_deliveries times move to the dead-letter stream"""
+    monkeypatch.setattr(settings, "event_max_deliveries", 1)
+    stream = "events:jobs"
+    await queue._ensure_group(stream, "g")
+    await leave_pending(queue, stream, "g", {'type': 'job', 'n': 1})
+
+    dispatcher = EventDispatcher("jobs", lambda event: asyncio.sleep(0))
+    await queue._reclaim(stream, "g", dispatcher, set())
+
+    dead = await queue.redis_client.xrange(f"{stream}:dead")
+    assert [json.loads(fields[b'data'])['n'] for _, fields in dead] == [1]
+    assert await pending_count(queue, stream, "g") == 0
+    assert dispatcher.depth == 0
@@ -0,0 +1,37 @@
+"""Keyset cursor tests"""
+
+import uuid
+import pytest
+from datetime import datetime
+from app.utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+def test_cursor_round_trip():
+    """A cursor decodes back to the sort key it was built from"""
+    created_at = datetime(2026, 10, 17, 9, 30, 15, 123456)
+    row_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, str(row_id))
+
+def test_invalid_cursor_rejected():
+    """Garbage cursors raise InvalidCursor"""
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+@pytest.mark.asyncio
+async def test_history_requires_membership(monkeypatch):
+    """Non-members get 403 before any page is read"""
+    from fastapi import HTTPException
+    from app.api.v1 import messages
+
+    async def is_member(room_id, user_id):
+        return user_id == "alice"
+
+    monkeypatch.setattr(messages.membership_cache, "is_member", is_member)
+
+    with pytest.raises(HTTPException) as error:
+        await messages.get_room_history("room-1", limit=50, user_id="eve", db=None)
+
+    assert error.value.status_code == 403
@@ -0,0 +1,59 @@
+"""Message partition retention tests"""
+
+import copy
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from app.config import settings
+from app.database.partitions import MessagePartitionManager, retention_horizon_days
+from app.models.pricing import PricingTable
+
+def test_no_archiving_while_a_tier_is_unlimited(monkeypatch):
+    """Unlimited history must stay readable, so nothing is detached"""
+    monkeypatch.setattr(settings, "message_archive_after_days", None)
+
+    assert any(
+        tier['features']['message_history_days'] == -1 for tier in PricingTable.TIERS.values()
+    )
+    assert retention_horizon_days() is None
+
+def test_horizon_is_longest_tier_history(monkeypatch):
+    monkeypatch.setattr(settings, "message_archive_after_days", None)
+    tiers = copy.deepcopy(PricingTable.TIERS)
+    for tier in tiers.values():
+        if tier['features']['message_history_days'] == -1:
+            tier['features']['message_history_days'] = 730
+    monkeypatch.setattr(PricingTable, "TIERS", tiers)
+
+    assert retention_horizon_days() == 730
+
+def test_explicit_override_wins(monkeypatch):
+    monkeypatch.setattr(settings, "message_archive_after_days", 90)
+
+    assert retention_horizon_days() == 90
+
+class RecordingConnection:
+    """Answers the pg_inherits query with fixed bounds and records DDL"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.statements = []
+
+    async def execute(self, statement):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            return SimpleNamespace(all=lambda: self.bounds)
+        self.statements.append(sql)
+
+@pytest.mark.asyncio
+async def test_months_inside_the_legacy_partition_are_skipped():
+    """Right after 0003, the current month still belongs to messages_legacy"""
+    conn = RecordingConnection([
+        ("messages_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00')"),
+        ("messages_p2026_11", "FOR VALUES FROM ('2026-11-01 00:00:00') TO ('2026-12-01 00:00:00')"),
+    ])
+
+    await MessagePartitionManager(months_ahead=2).ensure_future_partitions(conn, today=date(2026, 10, 17))
+
+    created = [sql for sql in conn.statements if sql.startswith("CREATE TABLE")]
+    assert [sql.split()[5] for sql in created] == ["messages_p2026_12"]
@@ -0,0 +1,72 @@
+"""Pool instrumentation and adaptive overflow tests"""
+
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database.pool_metrics import DB_POOL_CHECKOUT_TIMEOUTS, InstrumentedQueuePool, OverflowTuner
+
+class FakePool:
+    def __init__(self, max_overflow: int, saturated: int = 0, peak: int = 0):
+        self._max_overflow = max_overflow
+        self.saturated_checkouts = saturated
+        self.peak_overflow = peak
+
+    def overflow(self) -> int:
+        return 0
+
+def tuner_for(pool: FakePool, limit: int = 40) -> OverflowTuner:
+    return OverflowTuner({"primary": SimpleNamespace(pool=pool)}, limit=limit, step=5)
+
+@pytest.mark.asyncio
+async def test_checkout_timeouts_are_counted():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="test-timeouts",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    timeouts = DB_POOL_CHECKOUT_TIMEOUTS.labels(pool="test-timeouts")
+    before = timeouts._value.get()
+
+    async with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect():
+                pass
+
+    assert timeouts._value.get() == before + 1
+    assert engine.pool.saturated_checkouts >= 1
+    await engine.dispose()
+
+def test_tuner_grows_saturated_pool_up_to_limit():
+    pool = FakePool(max_overflow=10)
+    tuner = tuner_for(pool, limit=17)
+
+    pool.saturated_checkouts, pool.peak_overflow = 3, 10
+    tuner.adjust()
+    assert pool._max_overflow == 15
+
+    pool.saturated_checkouts, pool.peak_overflow = 3, 15
+    tuner.adjust()
+    assert pool._max_overflow == 17
+
+def test_tuner_ignores_waits_with_spare_overflow():
+    """Waits while overflow slots were still free are not a sizing problem"""
+    pool = FakePool(max_overflow=10, saturated=3, peak=4)
+    tuner_for(pool).adjust()
+
+    assert pool._max_overflow == 10
+
+def test_tuner_shrinks_idle_pool_to_configured_floor():
+    pool = FakePool(max_overflow=10)
+    tuner = tuner_for(pool)
+    pool._max_overflow = 22
+
+    tuner.adjust()
+    assert pool._max_overflow == 17
+    tuner.adjust()
+    tuner.adjust()
+    assert pool._max_overflow == 10
+    assert pool.saturated_checkouts == 0
@@ -0,0 +1,48 @@
+"""Cross-instance presence tests (fakeredis)"""
+
+import pytest
+import fakeredis
+from app.services.presence_service import PresenceService, OFFLINE
+
+def make_instance(server, name, frames):
+    rooms = {}
+
+    async def broadcast(room_id, frame):
+        frames.append((name, frame))
+
+    presence = PresenceService(lambda user_id: rooms.get(user_id, set()), broadcast)
+    presence.instance_id = name
+    presence.redis = fakeredis.aioredis.FakeRedis(server=server)
+    return presence, rooms
+
+def went_offline(frames, user_id):
+    return [frame for _, frame in frames if user_id in frame[OFFLINE]]
+
+@pytest.mark.asyncio
+async def test_leaving_one_instance_keeps_user_online_elsewhere():
+    """OFFLINE is reported only when the last instance following the room lets go"""
+    server = fakeredis.FakeServer()
+    frames = []
+    a, a_rooms = make_instance(server, "a", frames)
+    b, b_rooms = make_instance(server, "b", frames)
+
+    for presence, rooms in ((a, a_rooms), (b, b_rooms)):
+        rooms["alice"] = {"room-1"}
+        presence.heartbeat("alice")
+        presence.joined("room-1", "alice")
+        await presence.flush()
+    assert await a.online_users("room-1") == ["alice"]
+
+    # Instance a's socket unsubscribes; b still follows the room
+    a_rooms["alice"] = set()
+    a.left("room-1", "alice")
+    await a.flush()
+    assert await a.online_users("room-1") == ["alice"]
+    assert not went_offline(frames, "alice")
+
+    # b's last socket closes
+    b_rooms["alice"] = set()
+    b.disconnected("alice", {"room-1"})
+    await b.flush()
+    assert await a.online_users("room-1") == []
+    assert len(went_offline(frames, "alice")) == 1
@@ -0,0 +1,54 @@
+"""Shared Redis pool factory tests"""
+
+import pytest
+import fakeredis
+from redis.exceptions import ConnectionError
+from app import redis_client as redis_pools
+from app.config import settings
+from app.redis_client import InstrumentedBlockingPool, REDIS_POOL_EXHAUSTED, close_pools, redis_client
+
+@pytest.fixture(autouse=True)
+async def fresh_pools():
+    await close_pools()
+    yield
+    await close_pools()
+
+def test_clients_share_one_pool_per_decode_mode():
+    """Every caller borrows from the same bounded pool"""
+    first, second = redis_client(), redis_client()
+    decoded = redis_client(decode_responses=True)
+
+    assert first.connection_pool is second.connection_pool
+    assert decoded.connection_pool is not first.connection_pool
+    assert first.connection_pool.max_connections == settings.redis_max_connections
+
+@pytest.mark.asyncio
+async def test_close_pools_drops_shared_pools():
+    pool = redis_client().connection_pool
+
+    await close_pools()
+
+    assert redis_pools._pools == {}
+    assert redis_client().connection_pool is not pool
+
+@pytest.mark.asyncio
+async def test_exhausted_pool_times_out_and_is_counted():
+    """A full pool makes callers wait, then fail, instead of opening more connections"""
+    pool = InstrumentedBlockingPool(
+        pool_name="test-exhausted",
+        connection_class=fakeredis.aioredis.FakeAsyncRedisConnection,
+        server=fakeredis.FakeServer(),
+        max_connections=1,
+        timeout=0.05,
+        health_check_interval=0,
+    )
+    exhausted = REDIS_POOL_EXHAUSTED.labels(pool="test-exhausted")
+    before = exhausted._value.get()
+
+    held = await pool.get_connection("PING")
+    with pytest.raises(ConnectionError):
+        await pool.get_connection("PING")
+
+    assert exhausted._value.get() == before + 1
+    await pool.release(held)
+    await pool.disconnect()
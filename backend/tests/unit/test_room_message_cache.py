@@ -0,0 +1,48 @@
+"""RoomMessageCache warm/cold tests (fakeredis, no database)"""
+
+import pytest
+import fakeredis
+from app.caching.room_message_cache import RoomMessageCache
+
+def message(n: int) -> dict:
+    return {'id': f"m{n}", 'content': str(n)}
+
+@pytest.fixture
+def cache():
+    cache = RoomMessageCache(max_messages=5)
+    cache.redis = fakeredis.aioredis.FakeRedis()
+    return cache
+
+@pytest.mark.asyncio
+async def test_filled_small_room_is_served_whole(cache):
+    """A room with fewer messages than a page is warm once filled"""
+    await cache._fill("r", [message(2), message(1)])
+
+    assert await cache.get_latest("r", 3) == [message(2), message(1)]
+
+@pytest.mark.asyncio
+async def test_evicted_list_is_cold(cache):
+    """Appends to an evicted list do not pass for the room's whole history"""
+    await cache._fill("r", [message(2), message(1)])
+    await cache.redis.delete("room:r:recent")
+    await cache.append("r", message(3))
+
+    assert await cache.get_latest("r", 3) is None
+
+@pytest.mark.asyncio
+async def test_full_page_of_appends_is_served(cache):
+    """The newest messages are all appended, so a full page is exact even when cold"""
+    for n in range(1, 4):
+        await cache.append("r", message(n))
+
+    assert await cache.get_latest("r", 3) == [message(3), message(2), message(1)]
+
+@pytest.mark.asyncio
+async def test_marker_is_trimmed_once_list_is_full(cache):
+    await cache._fill("r", [message(4), message(3), message(2), message(1)])
+    await cache.append("r", message(5))
+    await cache.append("r", message(6))
+
+    items = await cache.redis.lrange("room:r:recent", 0, -1)
+    assert len(items) == 5
+    assert await cache.get_latest("r", 5) == [message(n) for n in range(6, 1, -1)]
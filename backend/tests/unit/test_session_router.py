@@ -0,0 +1,60 @@
+"""Read-your-writes routing tests"""
+
+import asyncio
+import pytest
+import fakeredis
+from starlette.requests import Request
+from app.database import SessionRouter
+from app.middleware.auth_context import AuthContextMiddleware
+from app.services.auth import AuthService
+
+@pytest.mark.asyncio
+async def test_mark_write_pins_reads_on_every_instance():
+    """Writes are shared through Redis and the pending task is kept referenced"""
+    server = fakeredis.FakeServer()
+    writer = SessionRouter("primary", ["replica"], [])
+    reader = SessionRouter("primary", ["replica"], [])
+    writer.redis = fakeredis.aioredis.FakeRedis(server=server)
+    reader.redis = fakeredis.aioredis.FakeRedis(server=server)
+    writer.healthy = reader.healthy = [0]
+
+    writer.mark_write("user-1", None, "user-2")
+    assert len(writer._marks) == 1
+    await asyncio.gather(*writer._marks)
+    assert not writer._marks
+
+    assert await reader.read_sessionmaker("user-1") == "primary"
+    assert await reader.read_sessionmaker("user-2") == "primary"
+    assert await reader.read_sessionmaker("user-3") == "replica"
+
+def test_mark_write_forgets_expired_keys(monkeypatch):
+    """Only keys inside the read-your-writes window stay in memory"""
+    clock = [100.0]
+    monkeypatch.setattr("app.database.time.monotonic", lambda: clock[0])
+    router = SessionRouter("primary", [], [])
+
+    router.mark_write("user-1", "user-2")
+    clock[0] += 5
+    router.mark_write("user-1")
+    clock[0] += 6
+    router.mark_write("user-3")
+
+    assert list(router._recent_writes) == ["user-1", "user-3"]
+
+@pytest.mark.asyncio
+async def test_middleware_sets_user_id(monkeypatch):
+    """The bearer token's user ends up on request.state.user_id"""
+    monkeypatch.setattr(
+        AuthService, "verify_token",
+        staticmethod(lambda token: "user-1" if token == "good" else None)
+    )
+    seen = []
+
+    async def endpoint(scope, receive, send):
+        seen.append(Request(scope).state.user_id)
+
+    middleware = AuthContextMiddleware(endpoint)
+    for headers in ([(b"authorization", b"Bearer good")], [(b"authorization", b"Bearer bad")], []):
+        await middleware({"type": "http", "headers": headers}, None, None)
+
+    assert seen == ["user-1", None, None]
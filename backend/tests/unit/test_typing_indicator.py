@@ -0,0 +1,56 @@
+"""Typing indicator aggregation tests"""
+
+import pytest
+from app.services.typing_indicator import TypingAggregator
+
+def make_aggregator(ttl: float = 6.0):
+    frames = []
+
+    async def broadcast(room_id, frame):
+        frames.append(frame)
+
+    return TypingAggregator(broadcast, interval=0.3, ttl=ttl), frames
+
+@pytest.mark.asyncio
+async def test_repeated_typing_frames_coalesce():
+    """Many typing frames in one window produce a single diff"""
+    aggregator, frames = make_aggregator()
+
+    for _ in range(20):
+        aggregator.update("room-1", "alice", True)
+    aggregator.update("room-1", "bob", True)
+    await aggregator.flush()
+
+    assert len(frames) == 1
+    assert frames[0]["started"] == ["alice", "bob"]
+    assert frames[0]["stopped"] == []
+
+    # Refreshing an existing typist emits nothing
+    aggregator.update("room-1", "alice", True)
+    await aggregator.flush()
+    assert len(frames) == 1
+
+@pytest.mark.asyncio
+async def test_start_then_stop_in_same_window_cancels():
+    """A user who starts and stops within one tick is never announced"""
+    aggregator, frames = make_aggregator()
+
+    aggregator.update("room-1", "alice", True)
+    aggregator.update("room-1", "alice", False)
+    await aggregator.flush()
+
+    assert frames == []
+
+@pytest.mark.asyncio
+async def test_stale_typists_expire():
+    """Typists expire after the TTL without a stop event"""
+    aggregator, frames = make_aggregator()
+
+    aggregator.update("room-1", "alice", True)
+    await aggregator.flush()
+
+    aggregator.typists["room-1"]["alice"] = 0
+    await aggregator.flush()
+
+    assert frames[-1]["stopped"] == ["alice"]
+    assert "room-1" not in aggregator.typists
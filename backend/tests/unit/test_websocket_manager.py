@@ -0,0 +1,129 @@
+"""ConnectionManager fan-out tests (fake sockets, fakeredis)"""
+
+import uuid
+import asyncio
+import orjson
+import pytest
+import fakeredis
+from app.config import settings
+from app.services import websocket_manager
+from app.services.websocket_manager import ConnectionManager, SLOW_CONSUMER_CLOSE_CODE
+
+class FakeWebSocket:
+    def __init__(self, block: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.block = block
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        if self.block:
+            await asyncio.Event().wait()
+        self.sent.append(payload)
+
+    async def send_bytes(self, payload):
+        await self.send_text(payload)
+
+    async def close(self, code: int, reason: str = ""):
+        self.closed_with = code
+
+@pytest.fixture
+async def manager():
+    manager = ConnectionManager()
+    manager.redis = fakeredis.aioredis.FakeRedis()
+    yield manager
+    for websocket in list(manager.outboxes):
+        await manager.release(websocket, "alice")
+
+async def join(manager: ConnectionManager, room_id: str, user_id: str = "alice", **kwargs) -> FakeWebSocket:
+    websocket = FakeWebSocket(**kwargs)
+    await manager.connect(websocket, room_id, user_id)
+    return websocket
+
+@pytest.mark.asyncio
+async def test_route_delivers_frames_from_other_instances(manager):
+    websocket = await join(manager, "room-1")
+    other = await join(manager, "room-2")
+
+    await manager._route(b"room:room-1", uuid.uuid4().hex.encode() + b'{"n":1}')
+    await manager._route("user:alice", uuid.uuid4().hex.encode() + b'{"n":2}')
+    await asyncio.sleep(0)
+
+    assert websocket.sent == ['{"n":1}', '{"n":2}']
+    assert other.sent == ['{"n":2}']  # Same user, different room
+
+@pytest.mark.asyncio
+async def test_route_skips_own_echo(manager):
+    """Local sockets were served directly, so our own publishes are dropped"""
+    websocket = await join(manager, "room-1")
+
+    await manager._route(b"room:room-1", manager.instance_id + b'{"n":1}')
+    await asyncio.sleep(0)
+
+    assert websocket.sent == []
+
+@pytest.mark.asyncio
+async def test_channels_are_shared_across_local_sockets(manager):
+    """One pub/sub subscription per channel, dropped with its last socket"""
+    first = await join(manager, "room-1")
+    second = await join(manager, "room-1", user_id="bob")
+    assert manager._channel_refs["room:room-1"] == 2
+
+    await manager.release(first, "alice")
+    assert manager._channel_refs["room:room-1"] == 1
+    await manager.release(second, "bob")
+    assert "room:room-1" not in manager._channel_refs
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_evicted(manager, monkeypatch):
+    """A full outbound queue closes that socket with 4008; others keep receiving"""
+    monkeypatch.setattr(settings, "ws_outbound_queue_size", 2)
+    slow = await join(manager, "room-1", block=True)
+    fast = await join(manager, "room-1", user_id="bob")
+
+    for n in range(4):
+        await manager.broadcast_to_room("room-1", {'n': n})
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert manager.outboxes[slow].closed
+    assert [orjson.loads(frame)['n'] for frame in fast.sent] == [0, 1, 2, 3]
+    await manager.release(fast, "bob")
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_on_sockets(manager):
+    """Broadcasts only enqueue, so a stalled socket cannot delay the sender"""
+    await join(manager, "room-1", block=True)
+
+    await asyncio.wait_for(manager.broadcast_to_room("room-1", {'n': 1}), 0.5)
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once(manager, monkeypatch):
+    """One serialization feeds Redis and every local socket"""
+    calls = []
+    encode = websocket_manager.encode_message
+
+    def counting_encode(message):
+        calls.append(message)
+        return encode(message)
+
+    monkeypatch.setattr(websocket_manager, "encode_message", counting_encode)
+    pubsub = manager.redis.pubsub()
+    await pubsub.subscribe("room:room-1")
+    sockets = [await join(manager, "room-1", user_id=f"user-{i}") for i in range(3)]
+
+    await manager.broadcast_to_room("room-1", {'n': 1})
+    await asyncio.sleep(0)
+
+    assert len(calls) == 1
+    frames = [websocket.sent[0] for websocket in sockets]
+    assert all(frame is frames[0] for frame in frames)
+
+    message = None
+    while message is None:
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+    assert message['data'] == manager.instance_id + orjson.dumps({'n': 1})
+    await pubsub.aclose()